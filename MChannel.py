@@ -1,8 +1,56 @@
 import streamlit as st
+from collections import deque
+import threading
+import time
 
-# Initialize session state variables for chat messages and username
+ROOM_NAME = "motivational_speaker_room"
+ROOM_HISTORY_SIZE = 500
+CHAT_POLL_SECONDS = 1
+
+class RoomStore:
+    # Process-wide chat rooms shared by every session. Each room keeps only its last
+    # ROOM_HISTORY_SIZE messages as (seq, username, message, sent_at) tuples, with seq
+    # increasing by one per message so readers can ask for what they haven't seen yet.
+    def __init__(self, history_size: int = ROOM_HISTORY_SIZE):
+        self.history_size = history_size
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def _room(self, room: str) -> dict:
+        with self._lock:
+            if room not in self._rooms:
+                self._rooms[room] = {"messages": deque(maxlen=self.history_size), "seq": 0, "lock": threading.Lock()}
+            return self._rooms[room]
+
+    def post(self, room: str, username: str, message: str) -> int:
+        state = self._room(room)
+        with state["lock"]:
+            state["seq"] += 1
+            state["messages"].append((state["seq"], username, message, time.time()))
+            return state["seq"]
+
+    def read_after(self, room: str, after_seq: int) -> list:
+        # Walks back from the newest entry, so the cost is the number of new messages
+        state = self._room(room)
+        with state["lock"]:
+            new = []
+            for record in reversed(state["messages"]):
+                if record[0] <= after_seq:
+                    break
+                new.append(record)
+        new.reverse()
+        return new
+
+@st.cache_resource
+def get_room_store() -> RoomStore:
+    return RoomStore()
+
+# Initialize session state variables for the chat view and username
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    # References into the shared room store, bounded like the room itself
+    st.session_state.messages = deque(maxlen=ROOM_HISTORY_SIZE)
+if "last_seq" not in st.session_state:
+    st.session_state.last_seq = 0
 if "username" not in st.session_state:
     st.session_state.username = None
 
@@ -24,7 +72,8 @@ else:
     st.sidebar.markdown(f"**Logged in as:** {st.session_state.username}")
     if st.sidebar.button("Logout"):
         st.session_state.username = None
-        st.session_state.messages = []
+        st.session_state.messages = deque(maxlen=ROOM_HISTORY_SIZE)
+        st.session_state.last_seq = 0
         st.rerun()
 
     # Layout: Split screen with video chat on the left and text chat on the right
@@ -33,8 +82,7 @@ else:
     # Left: Video & Audio communication using embedded Jitsi Meet
     with left_col:
         st.header("Video & Audio Chat")
-        room_name = "motivational_speaker_room"
-        jitsi_url = f"https://meet.jit.si/{room_name}"
+        jitsi_url = f"https://meet.jit.si/{ROOM_NAME}"
         st.markdown(
             f"""
             <iframe 
@@ -51,18 +99,24 @@ else:
     with right_col:
         st.header("Text Communication")
 
-        # Display chat messages
-        chat_container = st.container()
-        with chat_container:
-            for user, msg in st.session_state.messages:
+        # Display chat messages, polling the shared room for ones this session hasn't seen
+        @st.fragment(run_every=CHAT_POLL_SECONDS)
+        def chat_messages():
+            new = get_room_store().read_after(ROOM_NAME, st.session_state.last_seq)
+            if new:
+                st.session_state.messages.extend(new)
+                st.session_state.last_seq = new[-1][0]
+            for _, user, msg, _ in st.session_state.messages:
                 st.markdown(f"**{user}:** {msg}")
 
+        chat_messages()
+
         # Input for new message
         def send_message():
             message = st.session_state.new_message.strip()
             if message:
-                # Save new message with username
-                st.session_state.messages.append((st.session_state.username, message))
+                # Save new message with username to the shared room
+                get_room_store().post(ROOM_NAME, st.session_state.username, message)
                 st.session_state.new_message = ""  # Clear input
 
         st.text_input(
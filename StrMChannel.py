@@ -1,274 +1,2475 @@
 import streamlit as st
 import sqlite3
 from sqlite3 import Connection
-from typing import List, Tuple, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import ContextVar, copy_context
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Tuple, Optional
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+import csv
+import functools
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import queue
 import re
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+DB_PATH = os.environ.get("MOTIVATION_CHANNEL_DB", "motivation_channel.db")
+
+CHAT_PAGE_SIZE = 50
+CHAT_POLL_SECONDS = 1
+# How often an event's messages are checked in the DB for writes this process's event bus didn't see
+CHAT_DB_CHECK_SECONDS = float(os.environ.get("MOTIVATION_CHANNEL_DB_CHECK_SECONDS", "5"))
+REPLY_QUEUE_PAGE_SIZE = 10
+SEARCH_PAGE_SIZE = 20
+ROSTER_PAGE_SIZE = 100
+ROSTER_EXPORT_CHUNK_SIZE = 1000
+CATALOG_TTL_SECONDS = 30
+CATALOG_MAX_ENTRIES = 10000
+CHAT_HTML_CACHE_SIZE = 20000
+USER_CACHE_SIZE = 50000
+# Interests written by other processes (the CLI, replicas) show up once a cached record expires
+USER_CACHE_TTL_SECONDS = 30
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_CACHE_SIZE = 8
+
+# Question submissions: a token bucket per (user, event) plus duplicate suppression per event
+QUESTIONS_PER_MINUTE = float(os.environ.get("MOTIVATION_CHANNEL_QUESTIONS_PER_MINUTE", "6"))
+QUESTION_BURST = int(os.environ.get("MOTIVATION_CHANNEL_QUESTION_BURST", "3"))
+QUESTION_DEDUP_SECONDS = float(os.environ.get("MOTIVATION_CHANNEL_QUESTION_DEDUP_SECONDS", "300"))
+SUBMISSION_GUARD_SIZE = 50000
+
+ADMIN_USERNAMES = frozenset({"Pradeep Parmar (Admin)", "Vikrant Jadhav (Admin)"})
+MOBILE_RE = re.compile(r"\d{10}")
+
+SLOW_QUERY_MS = float(os.environ.get("MOTIVATION_CHANNEL_SLOW_QUERY_MS", "100"))
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+SLOW_QUERY_LOG_SIZE = 50
+
+logger = logging.getLogger("motivation_channel")
+
+# ---------- Query Instrumentation ----------
+
+# The helper call currently running in this context, and the per-rerun totals set up by main()
+# or by a fragment's own rerun
+_active_call: ContextVar[Optional[dict]] = ContextVar("active_db_call", default=None)
+_rerun_calls: ContextVar[Optional[Dict[str, list]]] = ContextVar("rerun_db_calls", default=None)
+
+# String, blob and numeric literals, which is how bound parameters appear in expanded SQL
+SQL_LITERAL_RE = re.compile(r"[xX]'[0-9a-fA-F]*'|'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+
+def redact_sql(statement: str) -> str:
+    # Mobile numbers and question text must not reach the logs, so every literal becomes ?
+    return " ".join(SQL_LITERAL_RE.sub("?", statement).split())
+
+class QueryStats:
+    # Aggregate call counts, latency histograms, rows and connections for every DB helper
+    def __init__(self):
+        self.helpers: Dict[str, dict] = {}
+        self.slow_queries: "deque[dict]" = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ms: float, rows: int, call: dict):
+        with self._lock:
+            entry = self.helpers.get(name)
+            if entry is None:
+                entry = self.helpers[name] = {
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "rows": 0,
+                    "connections": 0,
+                    "statements": 0,
+                    "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["rows"] += rows
+            entry["connections"] += call["connections"]
+            entry["statements"] += len(call["statements"])
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound), -1)
+            entry["buckets"][bucket] += 1
+
+    def log_slow(self, name: str, elapsed_ms: float, statements: List[str]):
+        # The trace callback sees statements with their parameters expanded; the plan is taken from
+        # that text, but only the redacted form is logged or kept for the JSON download
+        plans = []
+        for statement in statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            try:
+                with db() as conn:
+                    plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+            except sqlite3.Error:
+                plan = []
+            plans.append({"sql": redact_sql(statement), "plan": plan})
+        with self._lock:
+            self.slow_queries.append({"helper": name, "ms": round(elapsed_ms, 2), "queries": plans})
+        logger.warning("Slow DB helper %s took %.1f ms: %s", name, elapsed_ms, json.dumps(plans))
+
+    def snapshot(self) -> Tuple[Dict[str, dict], List[dict]]:
+        # Copies taken under the lock, so readers never iterate while another session records
+        with self._lock:
+            helpers = {name: dict(entry, buckets=list(entry["buckets"])) for name, entry in self.helpers.items()}
+            return helpers, list(self.slow_queries)
+
+    def to_json(self) -> str:
+        helpers, slow_queries = self.snapshot()
+        return json.dumps(
+            {"buckets_ms": LATENCY_BUCKETS_MS, "helpers": helpers, "slow_queries": slow_queries}, indent=2
+        )
 
-DB_PATH = "motivation_channel.db"
+    def to_prometheus(self) -> str:
+        lines = [
+            "# TYPE channel_db_calls_total counter",
+            "# TYPE channel_db_rows_total counter",
+            "# TYPE channel_db_connections_opened_total counter",
+            "# TYPE channel_db_statements_total counter",
+            "# TYPE channel_db_call_duration_ms histogram",
+        ]
+        helpers, _ = self.snapshot()
+        for name, entry in sorted(helpers.items()):
+            label = f'helper="{name}"'
+            lines.append(f"channel_db_calls_total{{{label}}} {entry['calls']}")
+            lines.append(f"channel_db_rows_total{{{label}}} {entry['rows']}")
+            lines.append(f"channel_db_connections_opened_total{{{label}}} {entry['connections']}")
+            lines.append(f"channel_db_statements_total{{{label}}} {entry['statements']}")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS + ("+Inf",), entry["buckets"]):
+                cumulative += count
+                lines.append(f'channel_db_call_duration_ms_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"channel_db_call_duration_ms_sum{{{label}}} {entry['total_ms']:.3f}")
+            lines.append(f"channel_db_call_duration_ms_count{{{label}}} {entry['calls']}")
+        return "\n".join(lines) + "\n"
+
+@st.cache_resource
+def get_query_stats() -> QueryStats:
+    return QueryStats()
+
+def instrumented(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Helpers called from inside another helper are accounted to the outer call
+        if _active_call.get() is not None:
+            return func(*args, **kwargs)
+        call = {"statements": [], "connections": 0}
+        token = _active_call.set(call)
+        rows = 0
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _active_call.reset(token)
+            stats = get_query_stats()
+            stats.record(name, elapsed_ms, rows, call)
+            rerun = _rerun_calls.get()
+            if rerun is not None:
+                entry = rerun.setdefault(name, [0, 0.0, 0])
+                entry[0] += 1
+                entry[1] += elapsed_ms
+                entry[2] += rows
+            if elapsed_ms >= SLOW_QUERY_MS:
+                stats.log_slow(name, elapsed_ms, call["statements"])
+
+    return wrapper
+
+@contextmanager
+def rerun_queries(run: str) -> Iterator[None]:
+    # Per-helper totals for one run of the app or of a fragment, kept for the stats panel. A fragment
+    # drawn as part of a full rerun is already counted in that rerun.
+    if _rerun_calls.get() is not None:
+        yield
+        return
+    calls: Dict[str, list] = {}
+    token = _rerun_calls.set(calls)
+    try:
+        yield
+    finally:
+        _rerun_calls.reset(token)
+        st.session_state.setdefault("last_rerun_queries", {})[run] = calls
 
-ADMIN_USERNAMES = ["Pradeep Parmar (Admin)", "Vikrant Jadhav (Admin)"]
+def fragment_queries(func):
+    # Fragment reruns skip main(), so they account their own helper calls
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with rerun_queries(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
 
 # ---------- Database Helper Functions ----------
 
-def get_db() -> Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    return conn
+DB_POOL_SIZE = 8
+READ_WORKERS = 4
+WRITE_BATCH_WINDOW_SECONDS = 0.005
+WRITE_BATCH_MAX = 64
+WRITE_RETRIES = 5
+WRITE_BACKOFF_SECONDS = 0.01
+WRITE_TIMEOUT_SECONDS = 10
+WRITE_LATENCY_HISTORY = 1024
+
+class ConnectionPool:
+    # Long-lived SQLite connections shared across reruns and sessions. Connections are
+    # tuned once when opened; sqlite3 keeps a per-connection prepared-statement cache.
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE, read_only: bool = False):
+        self.db_path = db_path
+        self.size = size
+        self.read_only = read_only
+        self.opened = 0
+        self.statements = 0
+        self.closed = False
+        self._idle: "queue.LifoQueue[Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def connect(self) -> Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-16000")
+        conn.execute("PRAGMA mmap_size=134217728")
+        conn.execute("PRAGMA busy_timeout=5000")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        conn.set_trace_callback(self._count_statement)
+        with self._lock:
+            self.opened += 1
+        call = _active_call.get()
+        if call is not None:
+            call["connections"] += 1
+        return conn
+
+    def _count_statement(self, statement: str):
+        with self._lock:
+            self.statements += 1
+        call = _active_call.get()
+        if call is not None:
+            call["statements"].append(statement)
+
+    def acquire(self) -> Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn: Connection):
+        if not self.closed and self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        # Borrowed connections are closed when they come back
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+@st.cache_resource
+def get_pool(db_path: str, read_only: bool = False) -> ConnectionPool:
+    return ConnectionPool(db_path, read_only=read_only)
+
+# Set inside fetch_many() workers so their helpers borrow from the read-only pool
+_read_only: ContextVar[bool] = ContextVar("read_only_db", default=False)
+
+@contextmanager
+def db() -> Iterator[Connection]:
+    # Borrow a pooled connection; commit on success, roll back on error.
+    pool = get_pool(DB_PATH, _read_only.get())
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+@st.cache_resource
+def get_read_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="channel-read")
+
+def fetch_many(queries: Dict[str, Tuple[Callable, tuple]]) -> Dict[str, object]:
+    # Runs independent read helpers concurrently on read-only WAL connections, so a rerun
+    # waits for the slowest query rather than the sum of all of them
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(func: Callable, args: tuple):
+        # Pool threads serve every session, so this session's context is attached for the task only
+        # and whatever the thread carried before is put back afterwards
+        thread = threading.current_thread()
+        before = dict(vars(thread))
+        if ctx is not None:
+            add_script_run_ctx(thread, ctx)
+        attached = [name for name, value in vars(thread).items() if name not in before or before[name] is not value]
+        try:
+            _read_only.set(True)
+            return func(*args)
+        finally:
+            for name in attached:
+                if name in before:
+                    setattr(thread, name, before[name])
+                else:
+                    delattr(thread, name)
+
+    executor = get_read_executor()
+    futures = {name: executor.submit(copy_context().run, run, func, args) for name, (func, args) in queries.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+class WriteQueue:
+    # Background writer that owns one connection and group-commits queued writes. Each write
+    # is a callable taking the connection; its return value resolves the future after commit.
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.batches = 0
+        self.writes = 0
+        self.max_batch = 0
+        self.retries = 0
+        self.failed_batches = 0
+        # (monotonic finish, ms) per batch: how long the writer spent getting it committed,
+        # lock waits and busy retries included
+        self.commit_ms: "deque[Tuple[float, float]]" = deque(maxlen=WRITE_LATENCY_HISTORY)
+        self._queue: "queue.Queue[Tuple[Callable[[Connection], object], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="channel-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Callable[[Connection], object]) -> Future:
+        future: Future = Future()
+        self._queue.put((write, future))
+        return future
+
+    def close(self):
+        # Writes submitted before this still commit; the writer thread then exits
+        self._queue.put((None, None))
+
+    def _run(self):
+        conn = self.pool.connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + WRITE_BATCH_WINDOW_SECONDS
+            while len(batch) < WRITE_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = any(write is None for write, _ in batch)
+            batch = [item for item in batch if item[0] is not None]
+            if batch:
+                started = time.monotonic()
+                self._commit(conn, batch)
+                finished = time.monotonic()
+                self.commit_ms.append((finished, (finished - started) * 1000))
+            if stop:
+                conn.close()
+                return
+
+    def _commit(self, conn: Connection, batch: List[Tuple[Callable[[Connection], object], Future]]):
+        for attempt in range(WRITE_RETRIES + 1):
+            results = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for write, future in batch:
+                    # A savepoint per write lets one failing write roll back without the rest
+                    conn.execute("SAVEPOINT queued_write")
+                    try:
+                        results.append((future, write(conn), None))
+                        conn.execute("RELEASE queued_write")
+                    except sqlite3.OperationalError as exc:
+                        if _is_busy(exc):
+                            raise
+                        conn.execute("ROLLBACK TO queued_write")
+                        conn.execute("RELEASE queued_write")
+                        results.append((future, None, exc))
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO queued_write")
+                        conn.execute("RELEASE queued_write")
+                        results.append((future, None, exc))
+                conn.commit()
+                break
+            except Exception as exc:
+                # Anything escaping a write's savepoint fails the whole batch, but never the writer thread
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                except sqlite3.Error:
+                    logger.exception("Rollback of a failed write batch failed")
+                busy = isinstance(exc, sqlite3.OperationalError) and _is_busy(exc)
+                if not busy or attempt == WRITE_RETRIES:
+                    self.failed_batches += 1
+                    for _, future in batch:
+                        future.set_exception(exc)
+                    return
+                self.retries += 1
+                time.sleep(WRITE_BACKOFF_SECONDS * 2 ** attempt)
+
+        self.batches += 1
+        self.writes += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+        for future, result, exc in results:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "writes": self.writes,
+            "mean_batch": round(self.writes / self.batches, 2) if self.batches else 0,
+            "max_batch": self.max_batch,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+        }
+
+    def commit_latencies(self, since: float, until: float) -> List[float]:
+        return [ms for finished, ms in list(self.commit_ms) if since <= finished <= until]
+
+@st.cache_resource
+def get_write_queue(db_path: str) -> WriteQueue:
+    return WriteQueue(get_pool(db_path))
+
+class EventBus:
+    # In-process change notifications: a version counter per event, bumped on every write. Writes
+    # from other processes are picked up by observe() comparing a DB marker between checks.
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._markers: Dict[int, Tuple[float, Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, event_id: int):
+        with self._lock:
+            self._versions[event_id] = self._versions.get(event_id, 0) + 1
+
+    def version(self, event_id: int) -> int:
+        return self._versions.get(event_id, 0)
+
+    def check_due(self, event_id: int, interval: float) -> bool:
+        # True for the first caller per interval, which is then expected to observe() the marker
+        now = time.monotonic()
+        with self._lock:
+            checked_at, marker = self._markers.get(event_id, (None, None))
+            if checked_at is not None and now - checked_at < interval:
+                return False
+            self._markers[event_id] = (now, marker)
+            return True
+
+    def observe(self, event_id: int, marker: Hashable):
+        # The first marker also bumps, since buffers may have synced before this process looked
+        with self._lock:
+            checked_at, previous = self._markers.get(event_id, (time.monotonic(), None))
+            self._markers[event_id] = (checked_at, marker)
+            if previous != marker:
+                self._versions[event_id] = self._versions.get(event_id, 0) + 1
+
+@st.cache_resource
+def get_event_bus() -> EventBus:
+    return EventBus()
+
+class LRUCache:
+    # Small thread-safe LRU map shared across sessions
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: object):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class CatalogCache:
+    # Read-through cache for rarely changing catalog queries, shared by every session.
+    # Entries expire after a TTL or when the generation is bumped by a catalog write.
+    def __init__(self, ttl: float = CATALOG_TTL_SECONDS, max_entries: int = CATALOG_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[int, float, object]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], object]):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and entry[0] == self.generation and now - entry[1] < self.ttl:
+            with self._lock:
+                self.hits += 1
+            return entry[2]
+        # Remember the generation before loading so a concurrent invalidation is not lost
+        generation = self.generation
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (generation, now, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self.generation += 1
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "generation": self.generation,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+@st.cache_resource
+def get_catalog_cache() -> CatalogCache:
+    return CatalogCache()
+
+def normalize_question(message: str) -> str:
+    return " ".join(message.lower().split())
+
+class SubmissionGuard:
+    # Rejects questions that arrive faster than the per-(user, event) token bucket refills, and
+    # a user's repeats of the same normalized text in one event within the dedup window
+    def __init__(
+        self,
+        per_minute: float = QUESTIONS_PER_MINUTE,
+        burst: int = QUESTION_BURST,
+        dedup_seconds: float = QUESTION_DEDUP_SECONDS,
+        max_entries: int = SUBMISSION_GUARD_SIZE,
+    ):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.dedup_seconds = dedup_seconds
+        self.accepted = 0
+        self.rate_limited = 0
+        self.deduplicated = 0
+        self._buckets = LRUCache(max_entries)
+        self._recent = LRUCache(max_entries)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(event_id: int, username: str, message: str) -> Tuple[int, str, str]:
+        return event_id, username, hashlib.sha1(normalize_question(message).encode("utf-8")).hexdigest()
+
+    def check(self, event_id: int, username: str, message: str) -> Optional[str]:
+        # Returns None when the submission may proceed, else "duplicate" or "rate_limited"
+        now = time.monotonic()
+        digest = self._digest(event_id, username, message)
+        with self._lock:
+            seen = self._recent.get(digest)
+            if seen is not None and now - seen < self.dedup_seconds:
+                self.deduplicated += 1
+                return "duplicate"
+            tokens, updated = self._buckets.get((username, event_id), (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets.put((username, event_id), (tokens, now))
+                self.rate_limited += 1
+                return "rate_limited"
+            self._buckets.put((username, event_id), (tokens - 1, now))
+            self._recent.put(digest, now)
+            self.accepted += 1
+            return None
+
+    def forget(self, event_id: int, username: str, message: str):
+        # Lets the same text through again after a submission that failed to write
+        self._recent.pop(self._digest(event_id, username, message))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "rate_limited": self.rate_limited,
+            "deduplicated": self.deduplicated,
+        }
+
+@st.cache_resource
+def get_submission_guard() -> SubmissionGuard:
+    return SubmissionGuard()
 
 def init_db():
-    conn = get_db()
-    c = conn.cursor()
-    # Users: name and unique valid mobile
-    c.execute(
+    with db() as conn:
+        c = conn.cursor()
+        # Users: name and unique valid mobile
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                mobile TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        # Courses for motivational content
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS courses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        # User interests in courses (unique user-course pair)
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_course_interests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                course_id INTEGER NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (user_id, course_id),
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                FOREIGN KEY(course_id) REFERENCES courses(id)
+            )
+            """
+        )
+        # Events linked optionally to courses (course_id nullable)
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE,
+                course_id INTEGER,
+                live INTEGER DEFAULT 1,
+                FOREIGN KEY(course_id) REFERENCES courses(id)
+            )
+            """
+        )
+        # Messages linked to events
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER NOT NULL,
+                username TEXT NOT NULL,
+                message TEXT NOT NULL,
+                reply TEXT,
+                reply_by TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(event_id) REFERENCES events(id)
+            )
+            """
+        )
+        migrate(conn)
+
+# ---------- Schema Migrations ----------
+
+def _add_reply_seq(conn: Connection):
+    # Replies carry a per-event sequence number so clients can fetch newly answered messages
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+    if "reply_seq" not in columns:
+        conn.execute("ALTER TABLE messages ADD COLUMN reply_seq INTEGER")
+
+def _add_lookup_indexes(conn: Connection):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_event_id ON messages(event_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_event_username ON messages(event_id, username)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_event_reply_seq ON messages(event_id, reply_seq)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_live ON events(live, id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_interests_course_timestamp ON user_course_interests(course_id, timestamp)"
+    )
+
+def _add_interest_counters(conn: Connection):
+    # courses.interest_count is kept in sync by triggers so the admin sidebar needs no COUNT(*) per course
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(courses)")}
+    if "interest_count" not in columns:
+        conn.execute("ALTER TABLE courses ADD COLUMN interest_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            mobile TEXT NOT NULL UNIQUE
+        UPDATE courses SET interest_count=(
+            SELECT COUNT(*) FROM user_course_interests i WHERE i.course_id=courses.id
         )
         """
     )
-    # Courses for motivational content
-    c.execute(
+    conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS courses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL UNIQUE
-        )
+        CREATE TRIGGER IF NOT EXISTS trg_interest_insert AFTER INSERT ON user_course_interests
+        BEGIN
+            UPDATE courses SET interest_count=interest_count+1 WHERE id=NEW.course_id;
+        END
         """
     )
-    # User interests in courses (unique user-course pair)
-    c.execute(
+    conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS user_course_interests (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            course_id INTEGER NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE (user_id, course_id),
-            FOREIGN KEY(user_id) REFERENCES users(id),
-            FOREIGN KEY(course_id) REFERENCES courses(id)
-        )
+        CREATE TRIGGER IF NOT EXISTS trg_interest_delete AFTER DELETE ON user_course_interests
+        BEGIN
+            UPDATE courses SET interest_count=interest_count-1 WHERE id=OLD.course_id;
+        END
         """
     )
-    # Events linked optionally to courses (course_id nullable)
-    c.execute(
+
+def _rebuild_participants(conn: Connection):
+    conn.execute("DELETE FROM event_participants")
+    conn.execute("INSERT OR IGNORE INTO event_participants SELECT DISTINCT event_id, username FROM messages")
+    conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE,
-            course_id INTEGER,
-            live INTEGER DEFAULT 1,
-            FOREIGN KEY(course_id) REFERENCES courses(id)
+        UPDATE events SET participant_count=(
+            SELECT COUNT(*) FROM event_participants p WHERE p.event_id=events.id
         )
         """
     )
-    # Messages linked to events
-    c.execute(
+
+def _add_participant_counters(conn: Connection):
+    # events.participant_count is bumped once per new (event, username) pair seen in messages
+    conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS event_participants (
             event_id INTEGER NOT NULL,
             username TEXT NOT NULL,
-            message TEXT NOT NULL,
-            reply TEXT,
-            reply_by TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(event_id) REFERENCES events(id)
+            PRIMARY KEY (event_id, username)
+        ) WITHOUT ROWID
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    if "participant_count" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_message_participant AFTER INSERT ON messages
+        BEGIN
+            INSERT OR IGNORE INTO event_participants (event_id, username) VALUES (NEW.event_id, NEW.username);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_participant_insert AFTER INSERT ON event_participants
+        BEGIN
+            UPDATE events SET participant_count=participant_count+1 WHERE id=NEW.event_id;
+        END
+        """
+    )
+    _rebuild_participants(conn)
+
+def _add_unanswered_index(conn: Connection):
+    # Partial index so the admin reply queue only walks messages still waiting for an answer
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_unanswered ON messages(event_id, id) WHERE reply IS NULL")
+
+def _add_message_search(conn: Connection):
+    # External-content FTS5 index over questions and replies, kept in sync by triggers
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            message, reply, content='messages', content_rowid='id'
         )
         """
     )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO messages_fts (rowid, message, reply) VALUES (NEW.id, NEW.message, NEW.reply);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message, reply)
+            VALUES ('delete', OLD.id, OLD.message, OLD.reply);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF message, reply ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message, reply)
+            VALUES ('delete', OLD.id, OLD.message, OLD.reply);
+            INSERT INTO messages_fts (rowid, message, reply) VALUES (NEW.id, NEW.message, NEW.reply);
+        END
+        """
+    )
+    conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+def _add_event_lifecycle(conn: Connection):
+    # closed_at drives archival age; archived_at marks events whose messages moved to the archive file
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    if "closed_at" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN closed_at DATETIME")
+    if "archived_at" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN archived_at DATETIME")
+    conn.execute("UPDATE events SET closed_at=CURRENT_TIMESTAMP WHERE live=0 AND closed_at IS NULL")
+
+def _add_message_idempotency_key(conn: Connection):
+    # Client-generated key per question so a retried submission can't insert twice
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+    if "idempotency_key" not in columns:
+        conn.execute("ALTER TABLE messages ADD COLUMN idempotency_key TEXT")
+    conn.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_idempotency_key
+        ON messages (idempotency_key) WHERE idempotency_key IS NOT NULL
+        """
+    )
+
+# Ordered schema steps; PRAGMA user_version records how many have been applied
+SCHEMA_MIGRATIONS = [
+    _add_reply_seq,
+    _add_lookup_indexes,
+    _add_interest_counters,
+    _add_participant_counters,
+    _add_unanswered_index,
+    _add_message_search,
+    _add_event_lifecycle,
+    _add_message_idempotency_key,
+]
+
+def migrate(conn: Connection):
     conn.commit()
-    conn.close()
+    for version, step in enumerate(SCHEMA_MIGRATIONS, start=1):
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process migrated first
+            if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                step(conn)
+                conn.execute(f"PRAGMA user_version={version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+# ---------- Storage Backends ----------
+
+STORAGE_BACKEND = os.environ.get("MOTIVATION_CHANNEL_BACKEND", "sqlite")
+
+class UserRecord(NamedTuple):
+    id: int
+    name: str
+    mobile: str
+    interests: frozenset
+
+def _fts_query(text: str) -> str:
+    # Quote every word so user input can't trip FTS5 syntax; the last word also matches as a prefix
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+class Storage(ABC):
+    # Persistence contract behind the DB helpers. Backends only store and fetch rows; caching,
+    # cache invalidation and event bus notifications stay in the helpers so every backend gets them.
+    # Writes that return a Future resolve to the event id they touched (or None) once committed.
+    @abstractmethod
+    def init(self):
+        ...
+
+    @abstractmethod
+    def add_user(self, name: str, mobile: str) -> bool:
+        ...
+
+    @abstractmethod
+    def get_user_by_mobile(self, mobile: str) -> Optional[Tuple[int, str]]:
+        ...
+
+    @abstractmethod
+    def load_user(self, user_id: int) -> Optional[UserRecord]:
+        ...
+
+    @abstractmethod
+    def add_course(self, title: str) -> bool:
+        ...
+
+    @abstractmethod
+    def remove_course(self, course_id: int):
+        ...
+
+    @abstractmethod
+    def get_courses(self) -> List[Tuple[int, str]]:
+        ...
+
+    @abstractmethod
+    def get_courses_with_interest_counts(self) -> List[Tuple[int, str, int]]:
+        ...
+
+    @abstractmethod
+    def count_interest_for_course(self, course_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def add_user_interest(self, user_id: int, course_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def get_interest_roster(
+        self, course_id: int, limit: int, before: Optional[Tuple[str, int]] = None
+    ) -> List[Tuple[str, str, str, int]]:
+        # (name, mobile, timestamp, interest id), newest first, strictly older than the (timestamp, id) cursor
+        ...
+
+    @abstractmethod
+    def create_event(self, event_name: str, course_id: Optional[int]) -> bool:
+        ...
+
+    @abstractmethod
+    def get_live_events(self) -> List[Tuple[int, str, Optional[int]]]:
+        ...
+
+    @abstractmethod
+    def get_event_id_by_name(self, event_name: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def close_event(self, event_id: int):
+        ...
+
+    @abstractmethod
+    def get_unique_user_count(self, event_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def add_message(
+        self, event_id: int, username: str, message: str, idempotency_key: Optional[str] = None
+    ) -> Future:
+        # A repeated idempotency key is a no-op that still resolves to the event id
+        ...
+
+    @abstractmethod
+    def add_reply(self, message_id: int, reply: str, admin_username: str) -> Future:
+        ...
+
+    @abstractmethod
+    def get_messages(self, event_id: int) -> List[Tuple[int, str, str, str, str]]:
+        ...
+
+    @abstractmethod
+    def iter_messages(self, event_id: int, chunk_size: int) -> Iterator[Tuple[int, str, str, str, str, str]]:
+        # (id, username, message, reply, reply_by, timestamp) in id order, read a chunk at a time
+        ...
+
+    @abstractmethod
+    def get_recent_messages(self, event_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        ...
+
+    @abstractmethod
+    def get_messages_before(self, event_id: int, before_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        ...
+
+    @abstractmethod
+    def get_messages_after(self, event_id: int, after_id: int) -> List[Tuple[int, str, str, str, str]]:
+        ...
+
+    @abstractmethod
+    def get_replies_after(self, event_id: int, after_seq: int) -> List[Tuple[int, str, str, int]]:
+        ...
+
+    @abstractmethod
+    def get_reply_version(self, event_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def get_unanswered_messages(self, event_id: int, limit: int, offset: int) -> List[Tuple[int, str, str]]:
+        ...
+
+    @abstractmethod
+    def count_unanswered(self, event_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def search_messages(
+        self, query: str, event_id: Optional[int], limit: int, offset: int
+    ) -> List[Tuple[int, int, str, str, str, str]]:
+        ...
+
+class SQLiteStorage(Storage):
+    # Default backend: pooled WAL connections for reads, the group-committing write queue for
+    # chat writes, and the migrated schema from init_db()
+    def init(self):
+        init_db()
+
+    # Where an event's messages live; the sharded backend overrides these three
+    def _message_db(self, event_id: int):
+        return db()
+
+    def _submit_message_write(self, event_id: Optional[int], write: Callable[[Connection], object]) -> Future:
+        return get_write_queue(DB_PATH).submit(write)
+
+    def _event_of_message(self, message_id: int) -> Optional[int]:
+        return None
+
+    def add_user(self, name: str, mobile: str) -> bool:
+        with db() as conn:
+            try:
+                conn.execute("INSERT INTO users (name, mobile) VALUES (?, ?)", (name, mobile))
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+    def get_user_by_mobile(self, mobile: str) -> Optional[Tuple[int, str]]:
+        with db() as conn:
+            return conn.execute("SELECT id, name FROM users WHERE mobile=?", (mobile,)).fetchone()
+
+    def load_user(self, user_id: int) -> Optional[UserRecord]:
+        with db() as conn:
+            row = conn.execute("SELECT id, name, mobile FROM users WHERE id=?", (user_id,)).fetchone()
+            if not row:
+                return None
+            rows = conn.execute("SELECT course_id FROM user_course_interests WHERE user_id=?", (user_id,))
+            return UserRecord(*row, frozenset(course_id for (course_id,) in rows))
+
+    def add_course(self, title: str) -> bool:
+        with db() as conn:
+            try:
+                conn.execute("INSERT INTO courses (title) VALUES (?)", (title,))
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+    def remove_course(self, course_id: int):
+        with db() as conn:
+            conn.execute("DELETE FROM user_course_interests WHERE course_id=?", (course_id,))
+            conn.execute("DELETE FROM events WHERE course_id=?", (course_id,))
+            conn.execute("DELETE FROM courses WHERE id=?", (course_id,))
+
+    def get_courses(self) -> List[Tuple[int, str]]:
+        with db() as conn:
+            return conn.execute("SELECT id, title FROM courses ORDER BY title ASC").fetchall()
+
+    def get_courses_with_interest_counts(self) -> List[Tuple[int, str, int]]:
+        with db() as conn:
+            return conn.execute("SELECT id, title, interest_count FROM courses ORDER BY title ASC").fetchall()
+
+    def count_interest_for_course(self, course_id: int) -> int:
+        with db() as conn:
+            row = conn.execute("SELECT interest_count FROM courses WHERE id=?", (course_id,)).fetchone()
+        return row[0] if row else 0
+
+    def add_user_interest(self, user_id: int, course_id: int) -> bool:
+        def write(conn: Connection):
+            conn.execute(
+                "INSERT INTO user_course_interests (user_id, course_id) VALUES (?, ?)", (user_id, course_id)
+            )
+
+        try:
+            get_write_queue(DB_PATH).submit(write).result(timeout=WRITE_TIMEOUT_SECONDS)
+        except sqlite3.IntegrityError:
+            return False
+        except (FutureTimeoutError, sqlite3.Error):
+            logger.warning("Interest of user %d in course %d was not saved", user_id, course_id, exc_info=True)
+            return False
+        return True
+
+    def get_interest_roster(
+        self, course_id: int, limit: int, before: Optional[Tuple[str, int]] = None
+    ) -> List[Tuple[str, str, str, int]]:
+        # idx_interests_course_timestamp ends in the rowid, so it serves both the seek and the order.
+        # SQLite only seeks on the leading column of a row-value comparison, so the cursor is split
+        # into the rest of its own timestamp and then everything older, each a bounded index range.
+        select = """
+            SELECT u.name, u.mobile, i.timestamp, i.id FROM user_course_interests i
+            JOIN users u ON i.user_id = u.id
+            WHERE i.course_id=? {}
+            ORDER BY i.timestamp DESC, i.id DESC LIMIT ?
+        """
+        with db() as conn:
+            if not before:
+                return conn.execute(select.format(""), (course_id, limit)).fetchall()
+            timestamp, interest_id = before
+            rows = conn.execute(
+                select.format("AND i.timestamp=? AND i.id<?"), (course_id, timestamp, interest_id, limit)
+            ).fetchall()
+            if len(rows) < limit:
+                rows += conn.execute(
+                    select.format("AND i.timestamp<?"), (course_id, timestamp, limit - len(rows))
+                ).fetchall()
+            return rows
+
+    def create_event(self, event_name: str, course_id: Optional[int]) -> bool:
+        with db() as conn:
+            try:
+                conn.execute("INSERT INTO events (name, course_id, live) VALUES (?, ?, 1)", (event_name, course_id))
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+    def get_live_events(self) -> List[Tuple[int, str, Optional[int]]]:
+        with db() as conn:
+            return conn.execute("SELECT id, name, course_id FROM events WHERE live=1 ORDER BY id DESC").fetchall()
+
+    def get_event_id_by_name(self, event_name: str) -> Optional[int]:
+        with db() as conn:
+            row = conn.execute("SELECT id FROM events WHERE name=?", (event_name,)).fetchone()
+        return row[0] if row else None
+
+    def close_event(self, event_id: int):
+        with db() as conn:
+            conn.execute("UPDATE events SET live=0, closed_at=CURRENT_TIMESTAMP WHERE id=?", (event_id,))
+
+    def get_unique_user_count(self, event_id: int) -> int:
+        with db() as conn:
+            row = conn.execute("SELECT participant_count FROM events WHERE id=?", (event_id,)).fetchone()
+        return row[0] if row else 0
+
+    def add_message(
+        self, event_id: int, username: str, message: str, idempotency_key: Optional[str] = None
+    ) -> Future:
+        def write(conn: Connection):
+            conn.execute(
+                """
+                INSERT INTO messages (event_id, username, message, idempotency_key) VALUES (?, ?, ?, ?)
+                ON CONFLICT(idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+                """,
+                (event_id, username, message, idempotency_key),
+            )
+            return event_id
+
+        return self._submit_message_write(event_id, write)
+
+    def add_reply(self, message_id: int, reply: str, admin_username: str) -> Future:
+        def write(conn: Connection):
+            row = conn.execute("SELECT event_id FROM messages WHERE id=?", (message_id,)).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                """
+                UPDATE messages SET reply=?, reply_by=?,
+                    reply_seq=(SELECT COALESCE(MAX(m.reply_seq), 0) + 1 FROM messages m WHERE m.event_id=messages.event_id)
+                WHERE id=?
+                """,
+                (reply, admin_username, message_id),
+            )
+            return row[0]
+
+        return self._submit_message_write(self._event_of_message(message_id), write)
+
+    def get_messages(self, event_id: int) -> List[Tuple[int, str, str, str, str]]:
+        archived = self._archived_messages(event_id)
+        if archived is not None:
+            return archived
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                """
+                SELECT id, username, message, reply, reply_by
+                FROM messages WHERE event_id=?
+                ORDER BY id ASC
+                """,
+                (event_id,),
+            ).fetchall()
+
+    def iter_messages(self, event_id: int, chunk_size: int) -> Iterator[Tuple[int, str, str, str, str, str]]:
+        last_id = 0
+        while True:
+            with self._message_db(event_id) as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, username, message, reply, reply_by, timestamp
+                    FROM messages WHERE event_id=? AND id > ?
+                    ORDER BY id ASC LIMIT ?
+                    """,
+                    (event_id, last_id, chunk_size),
+                ).fetchall()
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def _archived_messages(self, event_id: int) -> Optional[List[Tuple[int, str, str, str, str]]]:
+        # An archived event's messages live in the archive file, not in the messages table
+        if is_event_archived(event_id):
+            return [row[:5] for row in get_archived_messages(event_id)]
+        return None
+
+    def get_recent_messages(self, event_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        archived = self._archived_messages(event_id)
+        if archived is not None:
+            return archived[-limit:] if limit > 0 else []
+        with self._message_db(event_id) as conn:
+            rows = conn.execute(
+                """
+                SELECT id, username, message, reply, reply_by
+                FROM messages WHERE event_id=?
+                ORDER BY id DESC LIMIT ?
+                """,
+                (event_id, limit),
+            ).fetchall()
+        return rows[::-1]
+
+    def get_messages_before(self, event_id: int, before_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        archived = self._archived_messages(event_id)
+        if archived is not None:
+            rows = [row for row in archived if row[0] < before_id]
+            return rows[-limit:] if limit > 0 else []
+        with self._message_db(event_id) as conn:
+            rows = conn.execute(
+                """
+                SELECT id, username, message, reply, reply_by
+                FROM messages WHERE event_id=? AND id < ?
+                ORDER BY id DESC LIMIT ?
+                """,
+                (event_id, before_id, limit),
+            ).fetchall()
+        return rows[::-1]
+
+    def get_messages_after(self, event_id: int, after_id: int) -> List[Tuple[int, str, str, str, str]]:
+        archived = self._archived_messages(event_id)
+        if archived is not None:
+            return [row for row in archived if row[0] > after_id]
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                """
+                SELECT id, username, message, reply, reply_by
+                FROM messages WHERE event_id=? AND id > ?
+                ORDER BY id ASC
+                """,
+                (event_id, after_id),
+            ).fetchall()
+
+    def get_replies_after(self, event_id: int, after_seq: int) -> List[Tuple[int, str, str, int]]:
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                """
+                SELECT id, reply, reply_by, reply_seq
+                FROM messages WHERE event_id=? AND reply_seq > ?
+                ORDER BY reply_seq ASC
+                """,
+                (event_id, after_seq),
+            ).fetchall()
+
+    def get_reply_version(self, event_id: int) -> int:
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                "SELECT COALESCE(MAX(reply_seq), 0) FROM messages WHERE event_id=?", (event_id,)
+            ).fetchone()[0]
+
+    def get_unanswered_messages(self, event_id: int, limit: int, offset: int) -> List[Tuple[int, str, str]]:
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                """
+                SELECT id, username, message FROM messages
+                WHERE event_id=? AND reply IS NULL
+                ORDER BY id ASC LIMIT ? OFFSET ?
+                """,
+                (event_id, limit, offset),
+            ).fetchall()
+
+    def count_unanswered(self, event_id: int) -> int:
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE event_id=? AND reply IS NULL", (event_id,)
+            ).fetchone()[0]
+
+    def search_messages(
+        self, query: str, event_id: Optional[int], limit: int, offset: int
+    ) -> List[Tuple[int, int, str, str, str, str]]:
+        match = _fts_query(query)
+        if not match:
+            return []
+        event_filter = "AND m.event_id=?" if event_id is not None else ""
+        params = (match,) + ((event_id,) if event_id is not None else ()) + (limit, offset)
+        with db() as conn:
+            return conn.execute(
+                f"""
+                SELECT m.id, m.event_id, e.name, m.username,
+                    snippet(messages_fts, 0, '**', '**', '…', 16),
+                    snippet(messages_fts, 1, '**', '**', '…', 16)
+                FROM messages_fts
+                JOIN messages m ON m.id = messages_fts.rowid
+                LEFT JOIN events e ON e.id = m.event_id
+                WHERE messages_fts MATCH ? {event_filter}
+                ORDER BY rank LIMIT ? OFFSET ?
+                """,
+                params,
+            ).fetchall()
+
+def _completed(result: object) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+class MemoryStorage(Storage):
+    # In-process stand-in with the same contract, for exercising the app and the backend contract
+    # without a database server. Everything is lost when the process exits.
+    def __init__(self):
+        self.users: Dict[int, Tuple[int, str, str]] = {}
+        self.user_ids_by_mobile: Dict[str, int] = {}
+        self.courses: Dict[int, str] = {}
+        # (user id, course id) -> (timestamp, interest id)
+        self.interests: Dict[Tuple[int, int], Tuple[str, int]] = {}
+        # id -> [id, name, course id, live]
+        self.events: Dict[int, list] = {}
+        self.participants: Dict[int, set] = {}
+        # id -> [id, event id, username, message, reply, reply by, reply seq, timestamp]
+        self.messages: Dict[int, list] = {}
+        self.event_messages: Dict[int, List[int]] = {}
+        self.idempotency_keys: set = set()
+        self._ids = 0
+        self._lock = threading.RLock()
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def _rows(self, event_id: int) -> List[list]:
+        return [self.messages[msg_id] for msg_id in self.event_messages.get(event_id, [])]
+
+    def init(self):
+        pass
+
+    def add_user(self, name: str, mobile: str) -> bool:
+        with self._lock:
+            if mobile in self.user_ids_by_mobile:
+                return False
+            user_id = self._next_id()
+            self.users[user_id] = (user_id, name, mobile)
+            self.user_ids_by_mobile[mobile] = user_id
+            return True
+
+    def get_user_by_mobile(self, mobile: str) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            user_id = self.user_ids_by_mobile.get(mobile)
+            return self.users[user_id][:2] if user_id is not None else None
+
+    def load_user(self, user_id: int) -> Optional[UserRecord]:
+        with self._lock:
+            if user_id not in self.users:
+                return None
+            interests = frozenset(course_id for uid, course_id in self.interests if uid == user_id)
+            return UserRecord(*self.users[user_id], interests)
+
+    def add_course(self, title: str) -> bool:
+        with self._lock:
+            if title in self.courses.values():
+                return False
+            self.courses[self._next_id()] = title
+            return True
+
+    def remove_course(self, course_id: int):
+        with self._lock:
+            for key in [key for key in self.interests if key[1] == course_id]:
+                del self.interests[key]
+            for event_id in [event[0] for event in self.events.values() if event[2] == course_id]:
+                del self.events[event_id]
+            self.courses.pop(course_id, None)
+
+    def get_courses(self) -> List[Tuple[int, str]]:
+        with self._lock:
+            return sorted(self.courses.items(), key=lambda course: course[1])
+
+    def get_courses_with_interest_counts(self) -> List[Tuple[int, str, int]]:
+        with self._lock:
+            return [
+                (course_id, title, self.count_interest_for_course(course_id))
+                for course_id, title in self.get_courses()
+            ]
+
+    def count_interest_for_course(self, course_id: int) -> int:
+        with self._lock:
+            return sum(1 for _, cid in self.interests if cid == course_id)
+
+    def add_user_interest(self, user_id: int, course_id: int) -> bool:
+        with self._lock:
+            if (user_id, course_id) in self.interests:
+                return False
+            self.interests[(user_id, course_id)] = (time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()), self._next_id())
+            return True
+
+    def get_interest_roster(
+        self, course_id: int, limit: int, before: Optional[Tuple[str, int]] = None
+    ) -> List[Tuple[str, str, str, int]]:
+        with self._lock:
+            rows = sorted(
+                (self.users[uid][1:] + key for (uid, cid), key in self.interests.items() if cid == course_id),
+                key=lambda row: row[2:],
+                reverse=True,
+            )
+        if before:
+            rows = [row for row in rows if row[2:] < tuple(before)]
+        return rows[:limit]
+
+    def create_event(self, event_name: str, course_id: Optional[int]) -> bool:
+        with self._lock:
+            if self.get_event_id_by_name(event_name) is not None:
+                return False
+            event_id = self._next_id()
+            self.events[event_id] = [event_id, event_name, course_id, True]
+            return True
+
+    def get_live_events(self) -> List[Tuple[int, str, Optional[int]]]:
+        with self._lock:
+            return [tuple(event[:3]) for event in sorted(self.events.values(), reverse=True) if event[3]]
+
+    def get_event_id_by_name(self, event_name: str) -> Optional[int]:
+        with self._lock:
+            return next((event[0] for event in self.events.values() if event[1] == event_name), None)
+
+    def close_event(self, event_id: int):
+        with self._lock:
+            if event_id in self.events:
+                self.events[event_id][3] = False
+
+    def get_unique_user_count(self, event_id: int) -> int:
+        with self._lock:
+            return len(self.participants.get(event_id, ()))
+
+    def add_message(
+        self, event_id: int, username: str, message: str, idempotency_key: Optional[str] = None
+    ) -> Future:
+        with self._lock:
+            if idempotency_key is not None:
+                if idempotency_key in self.idempotency_keys:
+                    return _completed(event_id)
+                self.idempotency_keys.add(idempotency_key)
+            msg_id = self._next_id()
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            self.messages[msg_id] = [msg_id, event_id, username, message, None, None, 0, timestamp]
+            self.event_messages.setdefault(event_id, []).append(msg_id)
+            self.participants.setdefault(event_id, set()).add(username)
+        return _completed(event_id)
+
+    def add_reply(self, message_id: int, reply: str, admin_username: str) -> Future:
+        with self._lock:
+            row = self.messages.get(message_id)
+            if row is None:
+                return _completed(None)
+            row[4:7] = [reply, admin_username, self.get_reply_version(row[1]) + 1]
+        return _completed(row[1])
+
+    def get_messages(self, event_id: int) -> List[Tuple[int, str, str, str, str]]:
+        with self._lock:
+            return [(row[0],) + tuple(row[2:6]) for row in self._rows(event_id)]
+
+    def iter_messages(self, event_id: int, chunk_size: int) -> Iterator[Tuple[int, str, str, str, str, str]]:
+        with self._lock:
+            rows = [(row[0],) + tuple(row[2:6]) + (row[7],) for row in self._rows(event_id)]
+        yield from rows
+
+    def get_recent_messages(self, event_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        return self.get_messages(event_id)[-limit:] if limit > 0 else []
+
+    def get_messages_before(self, event_id: int, before_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        rows = [row for row in self.get_messages(event_id) if row[0] < before_id]
+        return rows[-limit:] if limit > 0 else []
+
+    def get_messages_after(self, event_id: int, after_id: int) -> List[Tuple[int, str, str, str, str]]:
+        return [row for row in self.get_messages(event_id) if row[0] > after_id]
+
+    def get_replies_after(self, event_id: int, after_seq: int) -> List[Tuple[int, str, str, int]]:
+        with self._lock:
+            rows = [row for row in self._rows(event_id) if row[6] > after_seq]
+        return [(row[0], row[4], row[5], row[6]) for row in sorted(rows, key=lambda row: row[6])]
+
+    def get_reply_version(self, event_id: int) -> int:
+        with self._lock:
+            return max((row[6] for row in self._rows(event_id)), default=0)
+
+    def get_unanswered_messages(self, event_id: int, limit: int, offset: int) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            rows = [tuple(row[0:1] + row[2:4]) for row in self._rows(event_id) if row[4] is None]
+        return rows[offset:offset + limit]
+
+    def count_unanswered(self, event_id: int) -> int:
+        with self._lock:
+            return sum(1 for row in self._rows(event_id) if row[4] is None)
+
+    def search_messages(
+        self, query: str, event_id: Optional[int], limit: int, offset: int
+    ) -> List[Tuple[int, int, str, str, str, str]]:
+        # Same word and last-word-prefix matching as the FTS query, newest first, without ranking
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        with self._lock:
+            results = []
+            for row in sorted(self.messages.values(), reverse=True):
+                if event_id is not None and row[1] != event_id:
+                    continue
+                text = re.findall(r"\w+", f"{row[3]} {row[4] or ''}".lower())
+                if all(word in text for word in words[:-1]) and any(w.startswith(words[-1]) for w in text):
+                    event = self.events.get(row[1])
+                    results.append((row[0], row[1], event[1] if event else None, row[2], row[3], row[4] or ""))
+        return results[offset:offset + limit]
+
+SHARD_CACHE_SIZE = 32
+SHARD_SEARCH_WORKERS = 8
+# Message ids in event N's shard start at N << SHARD_ID_BITS, so ids stay unique across shards
+# and a message id alone routes a reply to its shard
+SHARD_ID_BITS = 32
+
+def _init_shard(conn: Connection, event_id: int):
+    # One event's messages, with the same indexes, search table and idempotency key as the main file
+    if conn.execute("PRAGMA user_version").fetchone()[0]:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    reply TEXT,
+                    reply_by TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    reply_seq INTEGER,
+                    idempotency_key TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_event_id ON messages(event_id, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_event_reply_seq ON messages(event_id, reply_seq)")
+            _add_unanswered_index(conn)
+            _add_message_search(conn)
+            _add_message_idempotency_key(conn)
+            conn.execute("CREATE TABLE IF NOT EXISTS participants (username TEXT PRIMARY KEY) WITHOUT ROWID")
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_shard_participant AFTER INSERT ON messages
+                BEGIN
+                    INSERT OR IGNORE INTO participants (username) VALUES (NEW.username);
+                END
+                """
+            )
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('messages', ?)", (event_id << SHARD_ID_BITS,)
+            )
+            conn.execute("PRAGMA user_version=1")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+class ShardMap:
+    # Routes event ids to their shard files. The most recently written shards keep an open pool
+    # and their own writer, so each event has an independent write lock; reads of other shards
+    # open a short-lived connection on demand. Only writes create a shard; reads of an event
+    # without one go to a shared empty in-memory schema. Opening a shard (schema, pool, writer
+    # thread) happens outside the map lock, so a cold shard never stalls the other events.
+    def __init__(self, db_path: str, max_open: int = SHARD_CACHE_SIZE):
+        self.directory = os.path.splitext(db_path)[0] + "_shards"
+        self.max_open = max_open
+        self.opens = 0
+        self.evictions = 0
+        self._open: "OrderedDict[int, Tuple[ConnectionPool, WriteQueue]]" = OrderedDict()
+        # Shards being opened right now; other writers to the same event wait on its future
+        self._opening: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._empty: Optional[Connection] = None
+        self._empty_lock = threading.Lock()
+
+    def path(self, event_id: int) -> str:
+        return os.path.join(self.directory, f"event_{event_id}.db")
+
+    def event_ids(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = (re.fullmatch(r"event_(\d+)\.db", name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in names if match)
+
+    def _open_shard(self, event_id: int) -> Tuple[ConnectionPool, WriteQueue]:
+        # Called without the lock held; may wait on the shard file's busy timeout
+        os.makedirs(self.directory, exist_ok=True)
+        pool = ConnectionPool(self.path(event_id))
+        try:
+            conn = pool.acquire()
+            try:
+                _init_shard(conn, event_id)
+            finally:
+                pool.release(conn)
+        except BaseException:
+            pool.close()
+            raise
+        return pool, WriteQueue(pool)
+
+    def submit(self, event_id: int, write: Callable[[Connection], object]) -> Future:
+        while True:
+            with self._lock:
+                entry = self._open.get(event_id)
+                if entry is not None:
+                    # Submitting under the lock means an eviction can't close the writer in between
+                    self._open.move_to_end(event_id)
+                    return entry[1].submit(write)
+                opening = self._opening.get(event_id)
+                if opening is None:
+                    opening = self._opening[event_id] = Future()
+                    break
+            # Another thread is opening this shard; try again once it is in the map (or failed)
+            opening.exception()
+
+        evicted = None
+        try:
+            entry = self._open_shard(event_id)
+        except BaseException as exc:
+            with self._lock:
+                del self._opening[event_id]
+            opening.set_exception(exc)
+            raise
+        with self._lock:
+            del self._opening[event_id]
+            self._open[event_id] = entry
+            self.opens += 1
+            if len(self._open) > self.max_open:
+                _, evicted = self._open.popitem(last=False)
+                self.evictions += 1
+            future = entry[1].submit(write)
+        opening.set_result(entry)
+        if evicted is not None:
+            # Writes already queued on the evicted writer still commit before its thread exits
+            evicted[1].close()
+            evicted[0].close()
+        return future
+
+    @contextmanager
+    def connection(self, event_id: int) -> Iterator[Connection]:
+        with self._lock:
+            entry = self._open.get(event_id)
+        if entry is None and not os.path.exists(self.path(event_id)):
+            with self._empty_lock:
+                if self._empty is None:
+                    self._empty = sqlite3.connect(":memory:", check_same_thread=False)
+                    _init_shard(self._empty, 0)
+                yield self._empty
+            return
+        if entry is None:
+            conn = sqlite3.connect(self.path(event_id), timeout=5)
+            conn.execute("PRAGMA busy_timeout=5000")
+            try:
+                # Another process may have created the file without finishing its schema yet
+                _init_shard(conn, event_id)
+                yield conn
+            finally:
+                conn.close()
+            return
+        pool = entry[0]
+        conn = pool.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            pool.release(conn)
+
+    def drop(self, event_id: int):
+        # Deleting an event's history is removing its file, whatever its size
+        with self._lock:
+            opening = self._opening.get(event_id)
+        if opening is not None:
+            opening.exception()
+        with self._lock:
+            entry = self._open.pop(event_id, None)
+            if entry is not None:
+                entry[1].close()
+                entry[0].close()
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path(event_id) + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"open": len(self._open), "opens": self.opens, "evictions": self.evictions}
+
+@st.cache_resource
+def get_shard_map(db_path: str) -> ShardMap:
+    return ShardMap(db_path)
+
+@st.cache_resource
+def get_shard_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=SHARD_SEARCH_WORKERS, thread_name_prefix="channel-shard")
+
+class ShardedSQLiteStorage(SQLiteStorage):
+    # Users, courses and events stay in the main file; each event's messages get their own file
+    def init(self):
+        super().init()
+        # Messages still in the main file would vanish from every read once they route to the shards
+        with db() as conn:
+            if conn.execute("SELECT 1 FROM messages LIMIT 1").fetchone():
+                raise ValueError(
+                    f"Refusing the sharded backend: {DB_PATH} still has messages in its main table. "
+                    "Archive or export them first, or keep MOTIVATION_CHANNEL_BACKEND=sqlite."
+                )
+
+    def _shards(self) -> ShardMap:
+        return get_shard_map(DB_PATH)
+
+    def _message_db(self, event_id: int):
+        return self._shards().connection(event_id)
+
+    def _submit_message_write(self, event_id: Optional[int], write: Callable[[Connection], object]) -> Future:
+        return self._shards().submit(event_id, write)
+
+    def _event_of_message(self, message_id: int) -> Optional[int]:
+        return message_id >> SHARD_ID_BITS
+
+    def add_reply(self, message_id: int, reply: str, admin_username: str) -> Future:
+        if not os.path.exists(self._shards().path(self._event_of_message(message_id))):
+            return _completed(None)
+        return super().add_reply(message_id, reply, admin_username)
+
+    def remove_course(self, course_id: int):
+        with db() as conn:
+            rows = conn.execute("SELECT id FROM events WHERE course_id=?", (course_id,)).fetchall()
+        super().remove_course(course_id)
+        for (event_id,) in rows:
+            self._shards().drop(event_id)
+
+    def get_unique_user_count(self, event_id: int) -> int:
+        with self._message_db(event_id) as conn:
+            return conn.execute("SELECT COUNT(*) FROM participants").fetchone()[0]
+
+    def get_messages(self, event_id: int) -> List[Tuple[int, str, str, str, str]]:
+        # Shards aren't archived; dropping the file is how their history goes away
+        with self._message_db(event_id) as conn:
+            return conn.execute(
+                "SELECT id, username, message, reply, reply_by FROM messages WHERE event_id=? ORDER BY id ASC",
+                (event_id,),
+            ).fetchall()
+
+    def search_messages(
+        self, query: str, event_id: Optional[int], limit: int, offset: int
+    ) -> List[Tuple[int, int, str, str, str, str]]:
+        # Fans out to the shards in parallel and merges their best matches by rank. bm25 scores use
+        # each shard's own term statistics, so cross-event ordering is approximate.
+        match = _fts_query(query)
+        if not match:
+            return []
+        shards = self._shards()
+        event_ids = [event_id] if event_id is not None else shards.event_ids()
+
+        def search(shard_event_id: int):
+            with shards.connection(shard_event_id) as conn:
+                return conn.execute(
+                    """
+                    SELECT rank, m.id, m.event_id, m.username,
+                        snippet(messages_fts, 0, '**', '**', '…', 16),
+                        snippet(messages_fts, 1, '**', '**', '…', 16)
+                    FROM messages_fts
+                    JOIN messages m ON m.id = messages_fts.rowid
+                    WHERE messages_fts MATCH ?
+                    ORDER BY rank LIMIT ?
+                    """,
+                    (match, limit + offset),
+                ).fetchall()
+
+        matches = sorted(row for rows in get_shard_executor().map(search, event_ids) for row in rows)
+        matches = matches[offset:offset + limit]
+        if not matches:
+            return []
+        matched_events = sorted({row[2] for row in matches})
+        with db() as conn:
+            names = dict(
+                conn.execute(
+                    f"SELECT id, name FROM events WHERE id IN ({','.join('?' * len(matched_events))})", matched_events
+                ).fetchall()
+            )
+        return [
+            (msg_id, ev_id, names.get(ev_id), username, question, reply)
+            for _, msg_id, ev_id, username, question, reply in matches
+        ]
+
+# Every backend here keeps its data in one SQLite file or in process memory; there is no client/server
+# backend yet, so replicas still need to share one host's file. The maintenance paths (bulk import,
+# archival, counter checks, backups, query stats) use db() directly and only work on the SQLite files.
+STORAGE_BACKENDS: Dict[str, Callable[[], Storage]] = {
+    "sqlite": SQLiteStorage,
+    "memory": MemoryStorage,
+    "sharded": ShardedSQLiteStorage,
+}
+
+@st.cache_resource
+def open_storage(backend: str) -> Storage:
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r}; expected one of {sorted(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend]()
+
+def get_storage() -> Storage:
+    return open_storage(STORAGE_BACKEND)
+
+@st.cache_resource
+def get_bootstrap_lock() -> threading.Lock:
+    return threading.Lock()
+
+@st.cache_resource
+def bootstrap_storage(backend: str, db_path: str) -> float:
+    # Schema setup and migrations run once per server process instead of on every rerun; a failed
+    # bootstrap isn't cached, so the next rerun retries it. Returns the seconds it took.
+    with get_bootstrap_lock():
+        start = time.perf_counter()
+        open_storage(backend).init()
+        return time.perf_counter() - start
+
+# ---------- Channel Helpers ----------
 
 def is_valid_mobile(mobile: str) -> bool:
-    return bool(re.fullmatch(r"\d{10}", mobile))
+    return bool(MOBILE_RE.fullmatch(mobile))
 
+@instrumented
 def add_user(name: str, mobile: str) -> bool:
-    conn = get_db()
-    c = conn.cursor()
-    try:
-        c.execute("INSERT INTO users (name, mobile) VALUES (?, ?)", (name.strip(), mobile.strip()))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+    return get_storage().add_user(name.strip(), mobile.strip())
 
+@instrumented
 def get_user_by_mobile(mobile: str):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT id, name FROM users WHERE mobile=?", (mobile.strip(),))
-    user = c.fetchone()
-    conn.close()
-    return user
-
+    return get_storage().get_user_by_mobile(mobile.strip())
+
+@st.cache_resource
+def get_user_cache() -> LRUCache:
+    # (loaded at, record) keyed by user id, shared by every session
+    return LRUCache(USER_CACHE_SIZE)
+
+@instrumented
+def get_user_record(user_id: int) -> Optional[UserRecord]:
+    cache = get_user_cache()
+    entry = cache.get(user_id)
+    now = time.monotonic()
+    if entry is not None and now - entry[0] < USER_CACHE_TTL_SECONDS:
+        return entry[1]
+    record = get_storage().load_user(user_id)
+    if record is None:
+        cache.pop(user_id)
+        return None
+    cache.put(user_id, (now, record))
+    return record
+
+@instrumented
 def add_course(title: str) -> bool:
-    conn = get_db()
-    c = conn.cursor()
-    try:
-        c.execute("INSERT INTO courses (title) VALUES (?)", (title.strip(),))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
+    if not get_storage().add_course(title.strip()):
         return False
-    finally:
-        conn.close()
+    get_catalog_cache().invalidate()
+    return True
 
+@instrumented
 def remove_course(course_id: int) -> bool:
-    conn = get_db()
-    c = conn.cursor()
     try:
-        c.execute("DELETE FROM user_course_interests WHERE course_id=?", (course_id,))
-        c.execute("DELETE FROM events WHERE course_id=?", (course_id,))
-        c.execute("DELETE FROM courses WHERE id=?", (course_id,))
-        conn.commit()
-        return True
+        get_storage().remove_course(course_id)
     except Exception:
         return False
-    finally:
-        conn.close()
+    get_catalog_cache().invalidate()
+    return True
 
+@instrumented
 def get_all_courses() -> List[Tuple[int, str]]:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT id, title FROM courses ORDER BY title ASC")
-    courses = c.fetchall()
-    conn.close()
-    return courses
+    return get_catalog_cache().get("courses", get_storage().get_courses)
+
+@instrumented
+def get_courses_with_interest_counts() -> List[Tuple[int, str, int]]:
+    return get_catalog_cache().get("courses_with_counts", get_storage().get_courses_with_interest_counts)
 
+@instrumented
 def count_interest_for_course(course_id: int) -> int:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM user_course_interests WHERE course_id=?", (course_id,))
-    count = c.fetchone()[0]
-    conn.close()
-    return count
+    return get_storage().count_interest_for_course(course_id)
 
+@instrumented
 def add_user_interest(user_id: int, course_id: int) -> bool:
-    conn = get_db()
-    c = conn.cursor()
-    try:
-        c.execute("INSERT INTO user_course_interests (user_id, course_id) VALUES (?, ?)", (user_id, course_id))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
+    if not get_storage().add_user_interest(user_id, course_id):
         return False
-    finally:
-        conn.close()
-
-def get_interests_for_course(course_id: int) -> List[Tuple[str, str]]:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT u.name, u.mobile FROM user_course_interests i
-        JOIN users u ON i.user_id = u.id
-        WHERE i.course_id=?
-        ORDER BY i.timestamp DESC
-        """,
-        (course_id,),
-    )
-    users = c.fetchall()
-    conn.close()
-    return users
-
+    get_catalog_cache().invalidate("courses_with_counts")
+    get_user_cache().pop(user_id)
+    return True
+
+@instrumented
+def get_user_interest_ids(user_id: int) -> frozenset:
+    record = get_user_record(user_id)
+    return record.interests if record else frozenset()
+
+@instrumented
+def get_interest_roster(
+    course_id: int, limit: int = ROSTER_PAGE_SIZE, before: Optional[Tuple[str, int]] = None
+) -> List[Tuple[str, str, str, int]]:
+    return get_storage().get_interest_roster(course_id, limit, before)
+
+def iter_interest_roster(course_id: int, chunk_size: int = ROSTER_EXPORT_CHUNK_SIZE) -> Iterator[Tuple[str, str, str]]:
+    # Streams (name, mobile, timestamp) newest first, one keyset page per chunk
+    before = None
+    while True:
+        rows = get_storage().get_interest_roster(course_id, chunk_size, before)
+        for name, mobile, timestamp, _ in rows:
+            yield name, mobile, timestamp
+        if len(rows) < chunk_size:
+            return
+        before = rows[-1][2:]
+
+def interest_roster_csv(course_id: int) -> io.BytesIO:
+    # Built only when the download is requested; the rows are read in chunks rather than all at once
+    out = io.BytesIO()
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(("name", "mobile", "interested_at"))
+    writer.writerows(iter_interest_roster(course_id))
+    text.flush()
+    text.detach()
+    return out
+
+@instrumented
 def create_event(event_name: str, course_id: Optional[int] = None) -> bool:
-    conn = get_db()
-    c = conn.cursor()
-    try:
-        c.execute("INSERT INTO events (name, course_id, live) VALUES (?, ?, 1)", (event_name.strip(), course_id))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
+    if not get_storage().create_event(event_name.strip(), course_id):
         return False
-    finally:
-        conn.close()
+    get_catalog_cache().invalidate()
+    return True
 
+@instrumented
 def get_live_events() -> List[Tuple[int, str, Optional[int]]]:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT id, name, course_id FROM events WHERE live=1 ORDER BY id DESC")
-    events = c.fetchall()
-    conn.close()
-    return events
-
+    return get_catalog_cache().get("live_events", get_storage().get_live_events)
+
+class LiveEventIndex:
+    # Live events grouped by linked course, so a user's visible events are a set intersection
+    def __init__(self, events: List[Tuple[int, str, Optional[int]]]):
+        self.general = [event for event in events if event[2] is None]
+        self.by_course: Dict[int, List[Tuple[int, str, Optional[int]]]] = {}
+        for event in events:
+            if event[2] is not None:
+                self.by_course.setdefault(event[2], []).append(event)
+
+    def events_for(self, course_ids: frozenset) -> List[Tuple[int, str, Optional[int]]]:
+        visible = list(self.general)
+        for course_id in course_ids & self.by_course.keys():
+            visible.extend(self.by_course[course_id])
+        return sorted(visible, key=lambda event: event[0], reverse=True)
+
+def get_live_event_index() -> LiveEventIndex:
+    # Rebuilt lazily after create_event, close_event or remove_course bump the catalog generation
+    return get_catalog_cache().get("live_event_index", lambda: LiveEventIndex(get_live_events()))
+
+@instrumented
 def get_live_events_for_user(user_id: int) -> List[Tuple[int, str, Optional[int]]]:
-    conn = get_db()
-    c = conn.cursor()
-    # Retrieve events linked to user interested courses OR events with no course (general)
-    c.execute(
-        """
-        SELECT DISTINCT e.id, e.name, e.course_id FROM events e
-        LEFT JOIN user_course_interests i ON e.course_id = i.course_id
-        WHERE e.live=1 AND (i.user_id=? OR e.course_id IS NULL)
-        ORDER BY e.id DESC
-        """,
-        (user_id,),
-    )
-    events = c.fetchall()
-    conn.close()
-    return events
+    # Events linked to courses the user is interested in, plus general events with no course
+    return get_live_event_index().events_for(get_user_interest_ids(user_id))
 
+@instrumented
 def get_event_id_by_name(event_name: str) -> Optional[int]:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT id FROM events WHERE name=?", (event_name,))
-    row = c.fetchone()
-    conn.close()
-    return row[0] if row else None
-
-def add_message(event_id: int, username: str, message: str):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO messages (event_id, username, message) VALUES (?, ?, ?)",
-        (event_id, username, message),
-    )
-    conn.commit()
-    conn.close()
-
+    return get_storage().get_event_id_by_name(event_name)
+
+def _publish_when_done(future: Future, bus: EventBus):
+    # Writes resolve to the event id they touched (or None), published once committed
+    def done(f: Future):
+        if f.exception() is None and f.result() is not None:
+            bus.publish(f.result())
+    future.add_done_callback(done)
+
+@instrumented
+def add_message(event_id: int, username: str, message: str, idempotency_key: Optional[str] = None) -> Future:
+    future = get_storage().add_message(event_id, username, message, idempotency_key)
+    _publish_when_done(future, get_event_bus())
+    return future
+
+def submit_question(
+    event_id: int, username: str, message: str, idempotency_key: Optional[str] = None
+) -> Tuple[Optional[str], Optional[Future]]:
+    # Returns (None, future) for an accepted question, or ("duplicate" | "rate_limited", None)
+    guard = get_submission_guard()
+    rejected = guard.check(event_id, username, message)
+    if rejected:
+        return rejected, None
+    future = add_message(event_id, username, message, idempotency_key)
+
+    def forget_on_failure(f: Future):
+        if f.exception() is not None:
+            guard.forget(event_id, username, message)
+
+    future.add_done_callback(forget_on_failure)
+    return None, future
+
+@instrumented
 def get_messages(event_id: int) -> List[Tuple[int, str, str, str, str]]:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT id, username, message, reply, reply_by
-        FROM messages WHERE event_id=?
-        ORDER BY timestamp ASC
-        """,
-        (event_id,),
-    )
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-def add_reply(message_id: int, reply: str, admin_username: str):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        "UPDATE messages SET reply=?, reply_by=? WHERE id=?", (reply, admin_username, message_id)
-    )
-    conn.commit()
-    conn.close()
+    return get_storage().get_messages(event_id)
 
+def iter_event_messages(event_id: int, chunk_size: int = 1000) -> Iterator[Tuple[int, str, str, str, str, str]]:
+    # Streams a transcript in id order, one short read per chunk, so memory stays constant. Reads go
+    # through the storage backend, so a sharded event is read from its own file.
+    if is_event_archived(event_id):
+        yield from get_archived_messages(event_id)
+        return
+    yield from get_storage().iter_messages(event_id, chunk_size)
+
+@instrumented
+def get_recent_messages(event_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+    return get_storage().get_recent_messages(event_id, limit)
+
+@instrumented
+def get_messages_before(event_id: int, before_id: int, limit: int) -> List[Tuple[int, str, str, str, str]]:
+    return get_storage().get_messages_before(event_id, before_id, limit)
+
+@instrumented
+def get_messages_after(event_id: int, after_id: int) -> List[Tuple[int, str, str, str, str]]:
+    return get_storage().get_messages_after(event_id, after_id)
+
+@instrumented
+def get_replies_after(event_id: int, after_seq: int) -> List[Tuple[int, str, str, int]]:
+    return get_storage().get_replies_after(event_id, after_seq)
+
+@instrumented
+def get_reply_version(event_id: int) -> int:
+    return get_storage().get_reply_version(event_id)
+
+@instrumented
+def get_unanswered_messages(event_id: int, limit: int, offset: int = 0) -> List[Tuple[int, str, str]]:
+    return get_storage().get_unanswered_messages(event_id, limit, offset)
+
+@instrumented
+def count_unanswered(event_id: int) -> int:
+    return get_storage().count_unanswered(event_id)
+
+@instrumented
+def add_reply(message_id: int, reply: str, admin_username: str) -> Future:
+    future = get_storage().add_reply(message_id, reply, admin_username)
+    _publish_when_done(future, get_event_bus())
+    return future
+
+@instrumented
+def search_messages(
+    query: str, event_id: Optional[int] = None, limit: int = SEARCH_PAGE_SIZE, offset: int = 0
+) -> List[Tuple[int, int, str, str, str, str]]:
+    # Returns (message id, event id, event name, username, question snippet, reply snippet), best match first
+    return get_storage().search_messages(query, event_id, limit, offset)
+
+@instrumented
 def close_event(event_id: int):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("UPDATE events SET live=0 WHERE id=?", (event_id,))
-    conn.commit()
-    conn.close()
+    get_storage().close_event(event_id)
+    get_catalog_cache().invalidate()
+    get_event_bus().publish(event_id)
 
+@instrumented
 def get_unique_user_count(event_id: int) -> int:
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        "SELECT COUNT(DISTINCT username) FROM messages WHERE event_id=?", (event_id,)
+    return get_storage().get_unique_user_count(event_id)
+
+# ---------- Bulk Import ----------
+
+# Each call inserts one chunk in a single transaction and returns how many rows were new
+
+def bulk_add_users(rows: Iterable[Tuple[str, str]]) -> int:
+    with db() as conn:
+        return conn.executemany(
+            "INSERT INTO users (name, mobile) VALUES (?, ?) ON CONFLICT(mobile) DO NOTHING", rows
+        ).rowcount
+
+def bulk_add_courses(titles: Iterable[Tuple[str]]) -> int:
+    with db() as conn:
+        inserted = conn.executemany(
+            "INSERT INTO courses (title) VALUES (?) ON CONFLICT(title) DO NOTHING", titles
+        ).rowcount
+    get_catalog_cache().invalidate()
+    return inserted
+
+def bulk_add_interests(pairs: Iterable[Tuple[str, str]]) -> int:
+    # pairs are (mobile, course title); unknown users or courses are skipped
+    with db() as conn:
+        inserted = conn.executemany(
+            """
+            INSERT INTO user_course_interests (user_id, course_id)
+            SELECT u.id, c.id FROM users u, courses c WHERE u.mobile=? AND c.title=?
+            ON CONFLICT(user_id, course_id) DO NOTHING
+            """,
+            pairs,
+        ).rowcount
+    # Only clears this process's caches; the app's user records catch up within USER_CACHE_TTL_SECONDS
+    get_catalog_cache().invalidate()
+    get_user_cache().clear()
+    return inserted
+
+# ---------- Archival ----------
+
+def archive_path() -> str:
+    return os.path.splitext(DB_PATH)[0] + "_archive.db"
+
+def connect_archive() -> Connection:
+    conn = sqlite3.connect(archive_path(), timeout=5)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_events (
+            event_id INTEGER PRIMARY KEY,
+            name TEXT,
+            message_count INTEGER NOT NULL,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            transcript BLOB NOT NULL
+        )
+        """
     )
-    count = c.fetchone()[0]
-    conn.close()
+    return conn
+
+@st.cache_resource
+def get_archive_cache() -> LRUCache:
+    return LRUCache(ARCHIVE_CACHE_SIZE)
+
+def is_event_archived(event_id: int) -> bool:
+    with db() as conn:
+        row = conn.execute("SELECT archived_at FROM events WHERE id=?", (event_id,)).fetchone()
+    return bool(row and row[0])
+
+def get_archived_messages(event_id: int) -> List[Tuple[int, str, str, str, str, str]]:
+    # Transcripts are zlib-compressed JSON lines, decompressed on first read and kept in a small LRU
+    cache = get_archive_cache()
+    rows = cache.get(event_id)
+    if rows is None:
+        conn = connect_archive()
+        try:
+            row = conn.execute("SELECT transcript FROM archived_events WHERE event_id=?", (event_id,)).fetchone()
+        finally:
+            conn.close()
+        rows = []
+        if row:
+            rows = [tuple(json.loads(line)) for line in zlib.decompress(row[0]).decode("utf-8").splitlines()]
+        cache.put(event_id, rows)
+    return rows
+
+def archive_event(event_id: int, name: str) -> int:
+    # Read, archive and delete inside one write transaction, so a message posted meanwhile waits
+    # for the commit instead of being deleted without making it into the transcript
+    with db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        compressor = zlib.compressobj(level=9)
+        parts = []
+        count = 0
+        rows = conn.execute(
+            "SELECT id, username, message, reply, reply_by, timestamp FROM messages WHERE event_id=? ORDER BY id ASC",
+            (event_id,),
+        )
+        for row in rows:
+            parts.append(compressor.compress((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")))
+            count += 1
+        parts.append(compressor.flush())
+
+        # Write the archive copy first; if we stop before the commit, re-archiving simply replaces it
+        archive = connect_archive()
+        try:
+            with archive:
+                archive.execute(
+                    "INSERT OR REPLACE INTO archived_events (event_id, name, message_count, transcript) VALUES (?, ?, ?, ?)",
+                    (event_id, name, count, b"".join(parts)),
+                )
+        finally:
+            archive.close()
+        conn.execute("DELETE FROM messages WHERE event_id=?", (event_id,))
+        conn.execute("UPDATE events SET archived_at=CURRENT_TIMESTAMP WHERE id=?", (event_id,))
+    get_archive_cache().pop(event_id)
     return count
 
+def archive_closed_events(older_than_days: float = ARCHIVE_AFTER_DAYS) -> List[Tuple[str, int]]:
+    if isinstance(get_storage(), ShardedSQLiteStorage):
+        # Sharded events keep their messages in their own files, outside the main messages table
+        return []
+    with db() as conn:
+        events = conn.execute(
+            """
+            SELECT id, name FROM events
+            WHERE live=0 AND archived_at IS NULL AND closed_at <= datetime('now', ?)
+            ORDER BY id
+            """,
+            (f"-{older_than_days} days",),
+        ).fetchall()
+    return [(name, archive_event(event_id, name)) for event_id, name in events]
+
+def reclaim_space():
+    # The first run switches the database to incremental auto-vacuum, which needs one full VACUUM
+    pool = get_pool(DB_PATH)
+    conn = pool.acquire()
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+    finally:
+        pool.release(conn)
+
+def check_counters() -> List[Tuple[str, int, int, int]]:
+    # Returns (table, id, stored count, actual count) for every denormalized counter that drifted
+    with db() as conn:
+        courses = conn.execute(
+            """
+            SELECT 'courses', id, interest_count, actual FROM (
+                SELECT c.id, c.interest_count,
+                    (SELECT COUNT(*) FROM user_course_interests i WHERE i.course_id=c.id) AS actual
+                FROM courses c
+            ) WHERE interest_count != actual
+            """
+        ).fetchall()
+        events = conn.execute(
+            """
+            SELECT 'events', id, participant_count, actual FROM (
+                SELECT e.id, e.participant_count,
+                    (SELECT COUNT(DISTINCT username) FROM messages m WHERE m.event_id=e.id) AS actual
+                FROM events e WHERE e.archived_at IS NULL
+            ) WHERE participant_count != actual
+            """
+        ).fetchall()
+    return courses + events
+
+def rebuild_counters():
+    with db() as conn:
+        conn.execute(
+            """
+            UPDATE courses SET interest_count=(
+                SELECT COUNT(*) FROM user_course_interests i WHERE i.course_id=courses.id
+            )
+            """
+        )
+        # Archived events have no hot messages left, so their participants are kept as they are
+        conn.execute(
+            "DELETE FROM event_participants WHERE event_id NOT IN (SELECT id FROM events WHERE archived_at IS NOT NULL)"
+        )
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO event_participants
+            SELECT DISTINCT event_id, username FROM messages
+            """
+        )
+        conn.execute(
+            """
+            UPDATE events SET participant_count=(
+                SELECT COUNT(*) FROM event_participants p WHERE p.event_id=events.id
+            )
+            """
+        )
+
+# ---------- Backups ----------
+
+BACKUP_DIR = os.environ.get("MOTIVATION_CHANNEL_BACKUP_DIR")
+BACKUP_INTERVAL_SECONDS = float(os.environ.get("MOTIVATION_CHANNEL_BACKUP_INTERVAL_SECONDS", "0"))
+BACKUP_RETENTION = int(os.environ.get("MOTIVATION_CHANNEL_BACKUP_RETENTION", "7"))
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP_SECONDS = 0.01
+# A step-wise copy restarts whenever another connection writes; after this many, copy in one step
+BACKUP_MAX_RESTARTS = 3
+BACKUP_HISTORY_SIZE = 20
+
+class BackupRestarted(Exception):
+    pass
+
+def uses_shards() -> bool:
+    # True for the sharded backend, or for a database whose events already have shard files
+    return isinstance(get_storage(), ShardedSQLiteStorage) or bool(get_shard_map(DB_PATH).event_ids())
+
+def backup_dir() -> str:
+    return BACKUP_DIR or os.path.splitext(DB_PATH)[0] + "_backups"
+
+def list_backups(directory: Optional[str] = None) -> List[str]:
+    # Snapshot paths, newest first
+    directory = directory or backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    stem = os.path.basename(os.path.splitext(DB_PATH)[0])
+    names = [name for name in os.listdir(directory) if re.fullmatch(re.escape(stem) + r"-\d{8}-\d{6}(-\d{6})?\.db", name)]
+    return [os.path.join(directory, name) for name in sorted(names, reverse=True)]
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class BackupStats:
+    # Recent backups with how long this process's writers took to commit while each one ran
+    def __init__(self):
+        self.history: "deque[dict]" = deque(maxlen=BACKUP_HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, result: dict):
+        with self._lock:
+            self.history.append(result)
+
+    def last(self) -> Optional[dict]:
+        return self.history[-1] if self.history else None
+
+@st.cache_resource
+def get_backup_stats() -> BackupStats:
+    return BackupStats()
+
+def backup_database(directory: Optional[str] = None, retention: int = BACKUP_RETENTION) -> dict:
+    # Online copy through SQLite's backup API, a few pages per step with a sleep in between so
+    # writers get the database back. The snapshot is linked into place only once complete and
+    # gets a sha256 sidecar; snapshots beyond the retention count are deleted.
+    if uses_shards():
+        raise ValueError("Backups only cover the main database file; messages in per-event shards would be lost")
+    directory = directory or backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    started = time.time()
+    stem = os.path.basename(os.path.splitext(DB_PATH)[0])
+    # Microseconds in the name so two backups in the same second don't collide
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(started)) + f"-{int(started * 1e6) % 1000000:06d}"
+    path = os.path.join(directory, f"{stem}-{stamp}.db")
+    # A private temp file per backup, so concurrent backups can't write into each other's copy
+    fd, partial = tempfile.mkstemp(prefix=f"{stem}-", suffix=".partial", dir=directory)
+    os.close(fd)
+    steps: List[float] = []
+    restarts = 0
+    last = {"at": time.perf_counter(), "remaining": None}
+
+    def progress(status: int, remaining: int, total: int):
+        # Runs between steps, while the copy holds no lock on the source
+        nonlocal restarts
+        steps.append(time.perf_counter() - last["at"])
+        if last["remaining"] is not None and remaining > last["remaining"]:
+            restarts += 1
+            if restarts > BACKUP_MAX_RESTARTS:
+                raise BackupRestarted
+        last["remaining"] = remaining
+        if remaining:
+            time.sleep(BACKUP_STEP_SLEEP_SECONDS)
+        last["at"] = time.perf_counter()
+
+    writer = get_write_queue(DB_PATH)
+    retries_before = writer.stats()["retries"]
+    window_start = time.monotonic()
+    try:
+        src = sqlite3.connect(DB_PATH, timeout=5)
+        dst = sqlite3.connect(partial)
+        try:
+            try:
+                src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=BACKUP_STEP_SLEEP_SECONDS)
+            except BackupRestarted:
+                logger.warning("Backup restarted %d times under write load; copying in one step", restarts)
+                last["at"] = time.perf_counter()
+                last["remaining"] = None
+                src.backup(dst, pages=-1, progress=progress)
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+        window_end = time.monotonic()
+        # Unlike a rename, linking never replaces an existing snapshot
+        os.link(partial, path)
+    finally:
+        os.remove(partial)
+    waits = writer.commit_latencies(window_start, window_end)
+    checksum = file_sha256(path)
+    with open(path + ".sha256", "w") as f:
+        f.write(f"{checksum}  {os.path.basename(path)}\n")
+
+    for old in list_backups(directory)[max(1, retention):]:
+        for leftover in (old, old + ".sha256"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    result = {
+        "path": path,
+        "sha256": checksum,
+        "bytes": os.path.getsize(path),
+        "started_at": started,
+        "seconds": round(time.time() - started, 3),
+        "steps": len(steps),
+        "restarts": restarts,
+        "copy_ms": round(sum(steps) * 1000, 2),
+        "max_step_ms": round(max(steps, default=0) * 1000, 2),
+        # What this process's writers actually waited: in WAL mode the copy's read transaction
+        # doesn't block them, so commit latency during the copy is the number that matters
+        "writer_commits": len(waits),
+        "writer_commit_ms_mean": round(sum(waits) / len(waits), 2) if waits else 0,
+        "writer_commit_ms_max": round(max(waits, default=0), 2),
+        "writer_retries": writer.stats()["retries"] - retries_before,
+    }
+    get_backup_stats().record(result)
+    return result
+
+def verify_backup(path: str) -> Tuple[bool, str]:
+    sidecar = path + ".sha256"
+    if not os.path.exists(sidecar):
+        return False, "missing checksum file"
+    with open(sidecar) as f:
+        expected = f.read().split()[0]
+    if file_sha256(path) != expected:
+        return False, "checksum mismatch"
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        status = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if status != "ok":
+        return False, f"integrity check failed: {status}"
+    return True, "ok"
+
+def restore_backup(path: str):
+    # Copies a verified snapshot over the live database through the backup API, so readers never see
+    # a half-written file. Running app processes should be restarted afterwards to drop their caches.
+    if uses_shards():
+        raise ValueError(f"Refusing to restore {path}: a main-file snapshot can't restore per-event shards")
+    ok, reason = verify_backup(path)
+    if not ok:
+        raise ValueError(f"Refusing to restore {path}: {reason}")
+    src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    dst = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+class BackupScheduler:
+    # Daemon thread taking a snapshot every interval; failures are logged and retried next interval
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name="channel-backup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                result = backup_database()
+                logger.info(
+                    "Backup written to %s (writers' longest commit %.1f ms over %d commits)",
+                    result["path"], result["writer_commit_ms_max"], result["writer_commits"],
+                )
+            except Exception:
+                self.failures += 1
+                logger.exception("Scheduled backup failed")
+
+@st.cache_resource
+def start_backup_scheduler(db_path: str, interval: float) -> Optional[BackupScheduler]:
+    if uses_shards():
+        logger.warning("Scheduled backups are disabled: sharded messages live outside %s", db_path)
+        return None
+    return BackupScheduler(interval)
+
 # ---------- UI Functions ----------
 
 def login():
@@ -295,10 +2496,25 @@ def login():
             if not success:
                 st.error("❌ Registration failed. Mobile number might be already registered.")
                 return
+            user_id = get_user_by_mobile(mobile.strip())[0]
         st.session_state.current_user = name.strip()
         st.session_state.current_mobile = mobile.strip()
+        st.session_state.user_record = get_user_record(user_id)
         st.rerun()
 
+def current_user_record() -> Optional[UserRecord]:
+    # Resolved once at login; later reruns only refresh the interests from the shared cache
+    record = st.session_state.get("user_record")
+    if record is None:
+        user = get_user_by_mobile(st.session_state.current_mobile)
+        if not user:
+            return None
+        record = get_user_record(user[0])
+    else:
+        record = get_user_record(record.id)
+    st.session_state.user_record = record
+    return record
+
 def show_sidebar():
     st.sidebar.title("User Info")
     st.sidebar.write(f"👤 **{st.session_state.current_user}**")
@@ -312,8 +2528,71 @@ def show_sidebar():
         st.rerun()
 
     if is_admin:
+        stats = get_catalog_cache().stats()
+        st.sidebar.caption(f"Catalog cache: {stats['hits']} hits / {stats['misses']} misses")
+        users = get_user_cache().stats()
+        st.sidebar.caption(f"User cache: {users['entries']} users, {users['hits']} hits / {users['misses']} misses")
+        backup = get_backup_stats().last()
+        if backup:
+            st.sidebar.caption(
+                f"Last backup: {time.strftime('%Y-%m-%d %H:%M', time.localtime(backup['started_at']))}, "
+                f"writers' longest commit {backup['writer_commit_ms_max']} ms over {backup['writer_commits']} commits"
+            )
+        questions = get_submission_guard().stats()
+        st.sidebar.caption(
+            f"Questions: {questions['accepted']} accepted, {questions['rate_limited']} rate limited, "
+            f"{questions['deduplicated']} deduplicated"
+        )
+        if isinstance(get_storage(), SQLiteStorage):
+            writes = get_write_queue(DB_PATH).stats()
+            st.sidebar.caption(
+                f"Write queue: depth {writes['queue_depth']}, mean batch {writes['mean_batch']}, "
+                f"{writes['retries']} retries"
+            )
+        admin_query_stats_panel()
         admin_course_management()
         admin_event_creation()
+        admin_message_search()
+
+def admin_message_search():
+    st.sidebar.markdown("---")
+    st.sidebar.header("🔎 Search All Events")
+    message_search(st.sidebar, key="admin_search")
+
+def admin_query_stats_panel():
+    with st.sidebar.expander("📊 Query Stats"):
+        last_runs = st.session_state.get("last_rerun_queries", {})
+        st.markdown("**Previous rerun** (the app, and each fragment's latest own rerun)")
+        st.dataframe(
+            [
+                {"run": run, "helper": name, "calls": calls, "ms": round(total_ms, 2), "rows": rows}
+                for run, calls_by_helper in last_runs.items()
+                for name, (calls, total_ms, rows) in sorted(calls_by_helper.items(), key=lambda item: -item[1][1])
+            ],
+            hide_index=True,
+        )
+        stats = get_query_stats()
+        helpers, slow_queries = stats.snapshot()
+        st.markdown("**Since server start**")
+        st.dataframe(
+            [
+                {
+                    "helper": name,
+                    "calls": entry["calls"],
+                    "mean ms": round(entry["total_ms"] / entry["calls"], 2),
+                    "rows": entry["rows"],
+                    "connections": entry["connections"],
+                }
+                for name, entry in sorted(helpers.items(), key=lambda item: -item[1]["total_ms"])
+            ],
+            hide_index=True,
+        )
+        if slow_queries:
+            st.markdown(f"**Slow queries (≥ {SLOW_QUERY_MS:g} ms)**")
+            st.json(slow_queries[-5:], expanded=False)
+        col_json, col_prom = st.columns(2)
+        col_json.download_button("JSON", stats.to_json(), file_name="query_stats.json", mime="application/json")
+        col_prom.download_button("Prometheus", stats.to_prometheus(), file_name="query_stats.prom", mime="text/plain")
 
 def admin_course_management():
     st.sidebar.markdown("---")
@@ -331,11 +2610,10 @@ def admin_course_management():
         else:
             st.sidebar.warning("⚠️ Please enter a valid course title")
 
-    courses = get_all_courses()
+    courses = get_courses_with_interest_counts()
     if courses:
         st.sidebar.markdown("### Manage Courses & Interests")
-        for course_id, title in courses:
-            interest_count = count_interest_for_course(course_id)
+        for course_id, title, interest_count in courses:
             col1, col2, col3 = st.sidebar.columns([3, 1, 1])
             col1.write(title)
             if col2.button(f"{interest_count}", key=f"user_count_{course_id}"):
@@ -372,20 +2650,50 @@ def admin_event_creation():
 def show_interest_modal():
     if "show_interest_modal" in st.session_state and st.session_state.show_interest_modal:
         course_id = st.session_state.clicked_course_id
-        courses = get_all_courses()
-        course_title = next((t for cid, t in courses if cid == course_id), "Unknown Course")
-        users = get_interests_for_course(course_id)
+        courses = get_courses_with_interest_counts()
+        course_title, interest_count = next(
+            ((t, count) for cid, t, count in courses if cid == course_id), ("Unknown Course", 0)
+        )
+        # Cursors of the pages visited so far, so Prev can step back without an OFFSET scan
+        if st.session_state.get("roster_course_id") != course_id:
+            st.session_state.roster_course_id = course_id
+            st.session_state.roster_cursors = [None]
+        cursors = st.session_state.roster_cursors
+        rows = get_interest_roster(course_id, ROSTER_PAGE_SIZE + 1, cursors[-1])
 
         st.markdown("---")
-        st.markdown(f"### Users Interested in '{course_title}'")
-        if users:
-            for uname, umobile in users:
-                st.write(f"- {uname} 📱 {umobile}")
+        st.markdown(f"### Users Interested in '{course_title}' ({interest_count})")
+        if rows:
+            st.dataframe(
+                [
+                    {"Name": name, "Mobile": mobile, "Interested at": timestamp}
+                    for name, mobile, timestamp, _ in rows[:ROSTER_PAGE_SIZE]
+                ],
+                hide_index=True,
+                width="stretch",
+            )
+            prev_col, page_col, next_col = st.columns([1, 2, 1])
+            last_page = (interest_count - 1) // ROSTER_PAGE_SIZE
+            page_col.caption(f"Page {len(cursors)} of {last_page + 1}")
+            if prev_col.button("◀ Prev", disabled=len(cursors) == 1, key="roster_prev"):
+                cursors.pop()
+                st.rerun()
+            if next_col.button("Next ▶", disabled=len(rows) <= ROSTER_PAGE_SIZE, key="roster_next"):
+                cursors.append(rows[ROSTER_PAGE_SIZE - 1][2:])
+                st.rerun()
+            st.download_button(
+                "⬇️ Download CSV",
+                data=functools.partial(interest_roster_csv, course_id),
+                file_name=f"{course_title}_interested_users.csv",
+                mime="text/csv",
+                key="roster_download",
+            )
         else:
             st.info("No users have shown interest in this course yet.")
 
         if st.button("Close"):
             st.session_state.show_interest_modal = False
+            st.session_state.pop("roster_course_id", None)
             st.rerun()
 
 def confirm_remove_course():
@@ -408,36 +2716,217 @@ def confirm_remove_course():
                 del st.session_state.course_to_remove
                 st.rerun()
 
-def render_chat_bubble(message: str, is_admin: bool, username: str):
-    bubble_color = "#E0EFFF" if is_admin else "#DCF8C6"
-    align = "right" if is_admin else "left"
-    username_style = (
-        f'<div style="font-weight:bold; text-align:{align}; color:#0078D7; margin-bottom:4px;">{username}</div>'
-        if username
-        else ""
+def sync_chat_buffer(event_id: int) -> dict:
+    # Keep a per-session window of the event's messages and only fetch what changed since last rerun
+    chat = st.session_state.get("chat_buffer")
+    if not chat or chat["event_id"] != event_id:
+        # The reply version must be read before the messages so no reply falls in between
+        reply_seq = get_reply_version(event_id)
+        fetched = fetch_many(
+            {
+                "rows": (get_recent_messages, (event_id, CHAT_PAGE_SIZE)),
+                "participants": (get_unique_user_count, (event_id,)),
+            }
+        )
+        rows = fetched["rows"]
+        chat = {
+            "event_id": event_id,
+            "rows": {row[0]: row for row in rows},
+            "window": CHAT_PAGE_SIZE,
+            "has_older": len(rows) == CHAT_PAGE_SIZE,
+            "last_id": rows[-1][0] if rows else 0,
+            "reply_seq": reply_seq,
+            "participants": fetched["participants"],
+        }
+        st.session_state.chat_buffer = chat
+        return chat
+
+    # New rows carry their current reply, so a reply seen before its message is not lost
+    fetched = fetch_many(
+        {
+            "new": (get_messages_after, (event_id, chat["last_id"])),
+            "replies": (get_replies_after, (event_id, chat["reply_seq"])),
+            "participants": (get_unique_user_count, (event_id,)),
+        }
     )
+    rows = chat["rows"]
+    for row in fetched["new"]:
+        rows[row[0]] = row
+        chat["last_id"] = row[0]
+    for msg_id, reply, reply_by, reply_seq in fetched["replies"]:
+        if msg_id in rows:
+            rows[msg_id] = rows[msg_id][:3] + (reply, reply_by)
+        chat["reply_seq"] = max(chat["reply_seq"], reply_seq)
+    chat["participants"] = fetched["participants"]
+
+    if len(rows) > chat["window"]:
+        for msg_id in list(rows)[: len(rows) - chat["window"]]:
+            del rows[msg_id]
+        chat["has_older"] = True
+    return chat
+
+def load_older_messages(chat: dict):
+    oldest_id = next(iter(chat["rows"]), chat["last_id"] + 1)
+    older = get_messages_before(chat["event_id"], oldest_id, CHAT_PAGE_SIZE)
+    chat["rows"] = {**{row[0]: row for row in older}, **chat["rows"]}
+    chat["window"] += len(older)
+    chat["has_older"] = len(older) == CHAT_PAGE_SIZE
+
+CHAT_CSS = """
+<style>
+.chat-container {
+    max-height: 600px;
+    overflow-y: auto;
+    padding: 10px;
+    border: 1px solid #ddd;
+    border-radius: 10px;
+    background-color: #f9f9f9;
+}
+.chat-row { max-width: 70%; margin: 5px 0; text-align: left; }
+.chat-row.admin { text-align: right; }
+.chat-name { font-weight: bold; color: #0078D7; margin-bottom: 4px; }
+.chat-bubble {
+    display: inline-block;
+    background-color: #DCF8C6;
+    padding: 12px 16px;
+    border-radius: 20px;
+    box-shadow: 0 1px 1px rgba(0,0,0,0.1);
+    font-size: 16px;
+    white-space: pre-wrap;
+    word-wrap: break-word;
+}
+.chat-row.admin .chat-bubble { background-color: #E0EFFF; }
+</style>
+"""
+
+@st.cache_resource
+def get_bubble_cache() -> LRUCache:
+    return LRUCache(CHAT_HTML_CACHE_SIZE)
+
+def chat_bubble_html(message: str, is_admin: bool, username: str) -> str:
+    role = "admin" if is_admin else "user"
+    name = f'<div class="chat-name">{html.escape(username)}</div>' if username else ""
+    return f'<div class="chat-row {role}">{name}<div class="chat-bubble">{html.escape(message)}</div></div>'
+
+def chat_message_html(msg_id: int, username: str, message: str, reply: str, reply_by: str) -> str:
+    # A message's HTML only changes when it gets a reply, so memoize it by (id, reply)
+    cache = get_bubble_cache()
+    key = (msg_id, reply)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = chat_bubble_html(message, is_admin=False, username=username)
+        if reply:
+            fragment += chat_bubble_html(reply, is_admin=True, username=reply_by)
+        cache.put(key, fragment)
+    return fragment
+
+def render_chat_page(rows) -> str:
+    return '<div class="chat-container">' + "".join(chat_message_html(*row) for row in rows) + "</div>"
+
+def message_search(container, key: str, event_id: Optional[int] = None):
+    query = container.text_input("Search questions and replies", key=f"{key}_query", placeholder="e.g. confidence")
+    if not query.strip():
+        return
+    results = search_messages(query, event_id=event_id)
+    if not results:
+        container.info("No matching messages.")
+        return
+    for msg_id, result_event_id, event_name, username, question, reply in results:
+        where = "" if event_id is not None else f" in *{event_name or 'Unknown Event'}*"
+        container.markdown(f"**{username}**{where}: {question}")
+        if reply:
+            container.markdown(f"↳ {reply}")
+
+def event_version(event_id: int) -> int:
+    # Version of an event's messages and replies. The bus sees this process's writes at once; other
+    # processes' writes (replicas, the CLI) show up within CHAT_DB_CHECK_SECONDS through a cheap
+    # marker, the newest message id plus the reply version, checked by one poller per process.
+    bus = get_event_bus()
+    if bus.check_due(event_id, CHAT_DB_CHECK_SECONDS):
+        newest = get_recent_messages(event_id, 1)
+        bus.observe(event_id, (newest[-1][0] if newest else 0, get_reply_version(event_id)))
+    return bus.version(event_id)
+
+@st.fragment(run_every=CHAT_POLL_SECONDS)
+@fragment_queries
+def chat_pane(event_id: int):
+    # Polls the event version and only touches the DB when this event has changed
+    version = event_version(event_id)
+    chat = st.session_state.get("chat_buffer")
+    if not chat or chat["event_id"] != event_id or chat.get("bus_version") != version:
+        chat = sync_chat_buffer(event_id)
+        chat["bus_version"] = version
+
+    st.markdown(f"**Total participants:** {chat['participants']}")
+    st.markdown("---")
 
-    st.markdown(
-        f"""
-        <div style="max-width:70%; margin:5px 0; text-align:{align};">
-            {username_style}
-            <div style="
-                display:inline-block;
-                background-color:{bubble_color};
-                padding:12px 16px;
-                border-radius:20px;
-                box-shadow: 0 1px 1px rgba(0,0,0,0.1);
-                font-size:16px;
-                white-space: pre-wrap;
-                word-wrap: break-word;
-            ">
-                {message}
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
+    if chat["has_older"] and st.button("⬆️ Load older messages"):
+        load_older_messages(chat)
+
+    # The whole window goes out as a single markdown element instead of one per bubble
+    st.markdown(render_chat_page(chat["rows"].values()), unsafe_allow_html=True)
+
+@st.fragment(run_every=CHAT_POLL_SECONDS)
+@fragment_queries
+def admin_reply_queue(event_id: int):
+    # One shared reply editor over a page of unanswered questions, refreshed only when the event changes
+    version = event_version(event_id)
+    page = st.session_state.get("reply_queue_page", 0)
+    queue_state = st.session_state.get("reply_queue")
+    if not queue_state or (queue_state["event_id"], queue_state["version"], queue_state["page"]) != (
+        event_id,
+        version,
+        page,
+    ):
+        pending = count_unanswered(event_id)
+        page = min(page, max(0, (pending - 1) // REPLY_QUEUE_PAGE_SIZE))
+        queue_state = {
+            "event_id": event_id,
+            "version": version,
+            "page": page,
+            "pending": pending,
+            "rows": get_unanswered_messages(event_id, REPLY_QUEUE_PAGE_SIZE, page * REPLY_QUEUE_PAGE_SIZE),
+        }
+        st.session_state.reply_queue = queue_state
+        st.session_state.reply_queue_page = page
+
+    st.subheader(f"📥 Reply Queue ({queue_state['pending']} unanswered)")
+    if not queue_state["rows"]:
+        st.info("All questions have been answered.")
+        return
+
+    questions = {msg_id: f"{username}: {message[:80]}" for msg_id, username, message in queue_state["rows"]}
+    selected_id = st.radio(
+        "Select a question to answer", list(questions), format_func=questions.get, key="reply_queue_selected"
     )
 
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    last_page = (queue_state["pending"] - 1) // REPLY_QUEUE_PAGE_SIZE
+    page_col.caption(f"Page {page + 1} of {last_page + 1}")
+    if prev_col.button("◀ Prev", disabled=page == 0, key="reply_queue_prev"):
+        st.session_state.reply_queue_page = page - 1
+        st.rerun()
+    if next_col.button("Next ▶", disabled=page >= last_page, key="reply_queue_next"):
+        st.session_state.reply_queue_page = page + 1
+        st.rerun()
+
+    with st.form(key="reply_form", clear_on_submit=True):
+        reply_text = st.text_area("Write your reply here:", key="reply_text", max_chars=500, height=75)
+        submitted = st.form_submit_button("Send Reply")
+        if submitted:
+            if selected_id is not None and reply_text.strip():
+                try:
+                    add_reply(selected_id, reply_text.strip(), st.session_state.current_user).result(
+                        timeout=WRITE_TIMEOUT_SECONDS
+                    )
+                except Exception:
+                    st.error("❌ Could not send reply. Please try again.")
+                else:
+                    st.success("✅ Reply sent.")
+                    st.rerun()
+            else:
+                st.warning("⚠️ Please enter reply before sending.")
+
 def user_chat():
     st.header(f"🎤 Event: {st.session_state.current_event}")
 
@@ -449,134 +2938,93 @@ def user_chat():
             st.rerun()
         return
 
-    messages = get_messages(event_id)
-    user_count = get_unique_user_count(event_id)
-    st.markdown(f"**Total participants:** {user_count}")
-    st.markdown("---")
-
-    st.markdown(
-        """
-        <style>
-        .chat-container {
-            max-height: 600px;
-            overflow-y: auto;
-            padding: 10px;
-            border: 1px solid #ddd;
-            border-radius: 10px;
-            background-color: #f9f9f9;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-    for msg_id, username, message, reply, reply_by in messages:
-        render_chat_bubble(message, is_admin=False, username=username)
-        if reply:
-            render_chat_bubble(reply, is_admin=True, username=reply_by)
-
-        if st.session_state.current_user in ADMIN_USERNAMES and not reply:
-            with st.form(key=f"reply_form_{msg_id}", clear_on_submit=True):
-                reply_text = st.text_area(
-                    "Write your reply here:", key=f"reply_{msg_id}", max_chars=500, height=75
-                )
-                submitted = st.form_submit_button("Send Reply")
-                if submitted:
-                    if reply_text.strip():
-                        add_reply(msg_id, reply_text.strip(), st.session_state.current_user)
-                        st.success("✅ Reply sent.")
-                        st.rerun()
-                    else:
-                        st.warning("⚠️ Please enter reply before sending.")
-
-    st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown(CHAT_CSS, unsafe_allow_html=True)
+    with st.expander("🔎 Search this event"):
+        message_search(st, key="event_search", event_id=event_id)
+    chat_pane(event_id)
 
     if st.session_state.current_user not in ADMIN_USERNAMES:
         st.markdown("---")
         st.subheader("💬 Ask a Motivational Question")
-        new_question_col, refresh_col = st.columns([4, 1])
-
-        with new_question_col:
-            with st.form("ask_question_form", clear_on_submit=True):
-                question_text = st.text_area("Your question or request:", max_chars=500, height=100)
-                send = st.form_submit_button("Send Question")
-                if send:
-                    if question_text.strip():
-                        add_message(event_id, st.session_state.current_user, question_text.strip())
-                        st.success("✅ Your question has been submitted.")
-                        st.rerun()
+        with st.form("ask_question_form", clear_on_submit=True):
+            question_text = st.text_area("Your question or request:", max_chars=500, height=100)
+            send = st.form_submit_button("Send Question")
+            if send:
+                if question_text.strip():
+                    # The key belongs to one question: a retry of the same text reuses it so it can't
+                    # insert twice, while different text always gets a fresh key
+                    issued_for = (event_id, normalize_question(question_text))
+                    if st.session_state.get("question_key", (None, None))[1] != issued_for:
+                        st.session_state.question_key = (uuid.uuid4().hex, issued_for)
+                    rejected, future = submit_question(
+                        event_id, st.session_state.current_user, question_text.strip(), st.session_state.question_key[0]
+                    )
+                    if rejected == "duplicate":
+                        st.info("ℹ️ You have already sent this question.")
+                    elif rejected == "rate_limited":
+                        st.warning("⏳ You are sending questions too quickly. Please wait a moment and try again.")
                     else:
-                        st.warning("⚠️ Please enter a valid question.")
-
-        with refresh_col:
-            if st.button("🔄 Refresh Chat"):
-                st.rerun()
+                        try:
+                            future.result(timeout=WRITE_TIMEOUT_SECONDS)
+                        except Exception:
+                            st.error("❌ Could not submit your question. Please try again.")
+                        else:
+                            del st.session_state.question_key
+                            st.success("✅ Your question has been submitted.")
+                            st.rerun()
+                else:
+                    st.warning("⚠️ Please enter a valid question.")
 
     if st.session_state.current_user in ADMIN_USERNAMES:
         st.markdown("---")
-        admin_col1, admin_col2 = st.columns([1, 1])
-        with admin_col1:
-            if st.button("🛑 Close This Event"):
-                close_event(event_id)
-                st.success("Event closed successfully.")
-                st.session_state.current_event = None
-                st.rerun()
-        with admin_col2:
-            if st.button("🔄 Refresh Chat"):
-                st.rerun()
+        admin_reply_queue(event_id)
+        st.markdown("---")
+        if st.button("🛑 Close This Event"):
+            close_event(event_id)
+            st.success("Event closed successfully.")
+            st.session_state.current_event = None
+            st.rerun()
 
     st.markdown("---")
     if st.button("↩️ Leave Event"):
         st.session_state.current_event = None
         st.rerun()
 
-def user_show_courses_and_interest():
+def user_show_courses_and_interest(courses: List[Tuple[int, str]], user: Optional[UserRecord]):
     st.header("📚 Motivational Courses")
-    courses = get_all_courses()
     if not courses:
         st.info("ℹ️ No motivational courses added yet. Please check later.")
         return
 
-    user = get_user_by_mobile(st.session_state.current_mobile)
     if not user:
         st.error("User not found in DB. Please logout and login again.")
         return
-    user_id = user[0]
 
     course_titles = [c[1] for c in courses]
     selected_course = st.selectbox("Select a course to show interest", course_titles)
     if selected_course:
         course_id = [c[0] for c in courses if c[1] == selected_course][0]
-        conn = get_db()
-        c = conn.cursor()
-        c.execute(
-            "SELECT 1 FROM user_course_interests WHERE user_id=? AND course_id=?",
-            (user_id, course_id),
-        )
-        already_interested = c.fetchone() is not None
-        conn.close()
+        already_interested = course_id in user.interests
 
         if already_interested:
             st.success(f"✅ You have already shown interest in '{selected_course}'.")
         else:
             if st.button(f"🌟 Show Interest in '{selected_course}'"):
-                success = add_user_interest(user_id, course_id)
+                success = add_user_interest(user.id, course_id)
                 if success:
+                    current_user_record()
                     st.success(f"🎉 Interest shown for course '{selected_course}'.")
                 else:
                     st.warning(f"⚠️ Could not show interest. Maybe already registered.")
 
-def user_join_event():
+def user_join_event(user: Optional[UserRecord]):
     st.header("📢 Join a Live Event")
 
-    user = get_user_by_mobile(st.session_state.current_mobile)
     if not user:
         st.error("User not found. Please logout and login again.")
         return
-    user_id = user[0]
 
-    live_events = get_live_events_for_user(user_id)
+    live_events = get_live_events_for_user(user.id)
     if not live_events:
         st.info("ℹ️ No live events available for your interests or general. Please wait for admin to create one.")
         return
@@ -590,7 +3038,13 @@ def user_join_event():
 
 def main():
     st.set_page_config(page_title="Motivation Channel", page_icon="🎯", layout="centered")
-    init_db()
+    with rerun_queries("app"):
+        render_app()
+
+def render_app():
+    bootstrap_storage(STORAGE_BACKEND, DB_PATH)
+    if BACKUP_INTERVAL_SECONDS > 0 and isinstance(get_storage(), SQLiteStorage):
+        start_backup_scheduler(DB_PATH, BACKUP_INTERVAL_SECONDS)
 
     if "current_user" not in st.session_state:
         st.session_state.current_user = None
@@ -614,11 +3068,12 @@ def main():
         if st.session_state.current_user in ADMIN_USERNAMES:
             st.write("### Admin Dashboard")
             st.write("Use the sidebar to manage courses, create events, view user interests.")
-            user_join_event()  # Admin can join all events
+            user_join_event(current_user_record())  # Admin can join all events
         else:
-            user_show_courses_and_interest()
+            user = current_user_record()
+            user_show_courses_and_interest(get_all_courses(), user)
             st.markdown("---")
-            user_join_event()
+            user_join_event(user)
     else:
         user_chat()
 
@@ -0,0 +1,365 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import load_test
+from load_test import quiet_bare_mode_warnings
+
+RENDER_SIZES = [100, 1000, 10000]
+POOL_RERUNS = 50
+POOL_COURSES = 50
+POOL_MESSAGES = 200
+HELPER_CALLS = 1000
+COURSES = 1000
+INTERESTS = 100_000
+INTERESTS_PER_USER = 10
+SEARCH_MESSAGES = 1_000_000
+SEARCH_EVENTS = 200
+SEARCH_INSERT_CHUNK = 50_000
+# A frequent word, a word in one message out of RARE_EVERY, and a prefix, as typed into the search box
+SEARCH_QUERIES = {"common": "confidence", "rare": "marathon", "prefix": "motiv"}
+RARE_EVERY = 50_000
+TOPIC_WORDS = (
+    "motivated confidence focus habits discipline routine fear failure goals progress practice "
+    "patience energy stress sleep study exams career change steps family"
+).split()
+FILLER_WORDS = 5000
+SYLLABLES = "ka lo ri ne tu sa vel dor pi ren gu ha zi bel fen".split()
+REPEATS = 5
+
+def median_ms(run, repeats: int, setup=None) -> float:
+    timings = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+def chat_rows(count: int):
+    # Every other question answered, with characters that need escaping like real input
+    return [
+        (
+            msg_id,
+            f"Attendee {msg_id % 97}",
+            f"Question {msg_id}: how do I keep going when work & family pull <both> ways?",
+            "Pick one small step for today and do it first." if msg_id % 2 else None,
+            "Vikrant Jadhav (Admin)" if msg_id % 2 else None,
+        )
+        for msg_id in range(1, count + 1)
+    ]
+
+def bench_render(args) -> dict:
+    import StrMChannel
+
+    cache = StrMChannel.get_bubble_cache()
+    results = []
+    for size in args.sizes:
+        rows = chat_rows(size)
+        page = StrMChannel.render_chat_page(rows)
+        results.append({
+            "messages": size,
+            "payload_chars": len(page),
+            "payload_bytes": len(page.encode()),
+            # The old renderer sent one st.markdown per question and per reply; this sends one
+            "markdown_calls_per_bubble_renderer": size + sum(1 for row in rows if row[3]),
+            "cold_render_ms": median_ms(lambda: StrMChannel.render_chat_page(rows), args.repeats, cache.clear),
+            # Reruns after the first hit the (id, reply) memo for every bubble
+            "warm_render_ms": median_ms(lambda: StrMChannel.render_chat_page(rows), args.repeats),
+        })
+    return {"benchmark": "render", "bubble_cache_size": StrMChannel.CHAT_HTML_CACHE_SIZE, "results": results}
+
+def synthetic_messages(count: int, events: int, seed: int = 7):
+    # Filler words with Zipf-like frequencies plus one or two topic words per question, so a topic
+    # word matches a few percent of messages rather than most of them
+    rng = random.Random(seed)
+    filler = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(FILLER_WORDS)]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, FILLER_WORDS + 1)))
+
+    def sentence(length: int) -> list:
+        words = rng.choices(filler, cum_weights=cum_weights, k=length)
+        for _ in range(rng.randint(1, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(TOPIC_WORDS))
+        return words
+
+    for i in range(1, count + 1):
+        words = sentence(rng.randint(8, 20))
+        if i % RARE_EVERY == 0:
+            words.insert(rng.randrange(len(words)), "marathon")
+        reply = " ".join(sentence(12)) if i % 3 == 0 else None
+        yield i % events + 1, f"Attendee {i % 997}", " ".join(words).capitalize() + "?", reply
+
+def like_search(StrMChannel, query: str, limit: int):
+    # What search looked like without the index: a substring scan over both columns, newest first
+    pattern = f"%{query}%"
+    with StrMChannel.db() as conn:
+        return conn.execute(
+            """
+            SELECT m.id, m.event_id, e.name, m.username, m.message, m.reply
+            FROM messages m LEFT JOIN events e ON e.id = m.event_id
+            WHERE m.message LIKE ? OR m.reply LIKE ?
+            ORDER BY m.id DESC LIMIT ?
+            """,
+            (pattern, pattern, limit),
+        ).fetchall()
+
+def fts_count(StrMChannel, query: str) -> int:
+    with StrMChannel.db() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH ?", (StrMChannel._fts_query(query),)
+        ).fetchone()[0]
+
+def bench_search(args) -> dict:
+    import StrMChannel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        StrMChannel.DB_PATH = os.path.join(tmp, "search.db")
+        StrMChannel.init_db()
+        start = time.perf_counter()
+        with StrMChannel.db() as conn:
+            conn.executemany(
+                "INSERT INTO events (name, live) VALUES (?, 0)",
+                [(f"Event {n}",) for n in range(1, SEARCH_EVENTS + 1)],
+            )
+        rows = synthetic_messages(args.messages, SEARCH_EVENTS)
+        while True:
+            chunk = [row for _, row in zip(range(SEARCH_INSERT_CHUNK), rows)]
+            if not chunk:
+                break
+            # Through the FTS triggers, as the app's own inserts go
+            with StrMChannel.db() as conn:
+                conn.executemany("INSERT INTO messages (event_id, username, message, reply) VALUES (?, ?, ?, ?)", chunk)
+        load_seconds = time.perf_counter() - start
+
+        results = []
+        for name, query in SEARCH_QUERIES.items():
+            results.append({
+                "query": name,
+                "text": query,
+                "matching_messages": fts_count(StrMChannel, query),
+                "fts_results": len(StrMChannel.search_messages(query, limit=args.limit)),
+                "like_results": len(like_search(StrMChannel, query, args.limit)),
+                "fts_ms": median_ms(lambda: StrMChannel.search_messages(query, limit=args.limit), args.repeats),
+                "like_ms": median_ms(lambda: like_search(StrMChannel, query, args.limit), args.repeats),
+            })
+        database_bytes = os.path.getsize(StrMChannel.DB_PATH)
+    return {
+        "benchmark": "search",
+        "messages": args.messages,
+        "limit": args.limit,
+        "load_seconds": round(load_seconds, 1),
+        "database_bytes": database_bytes,
+        "results": results,
+    }
+
+def per_call_pool(StrMChannel):
+    # The connection handling before pooling: every helper call opened a bare connection and
+    # closed it again. Keeping nothing idle makes each db() block do the same.
+    class PerCallConnections(StrMChannel.ConnectionPool):
+        def connect(self):
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.set_trace_callback(self._count_statement)
+            with self._lock:
+                self.opened += 1
+            return conn
+
+    return lambda db_path, read_only=False: PerCallConnections(db_path, size=0)
+
+def pooled(StrMChannel):
+    return lambda db_path, read_only=False: StrMChannel.ConnectionPool(db_path, read_only=read_only)
+
+def bench_pool(args) -> dict:
+    import StrMChannel
+
+    get_pool = StrMChannel.get_pool
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        StrMChannel.DB_PATH = os.path.join(tmp, "pool.db")
+        StrMChannel.init_db()
+        for n in range(POOL_COURSES):
+            StrMChannel.add_course(f"Course {n}")
+        StrMChannel.create_event(load_test.EVENT_NAME)
+        event_id = StrMChannel.get_event_id_by_name(load_test.EVENT_NAME)
+        for n in range(POOL_MESSAGES):
+            StrMChannel.add_message(event_id, f"Attendee {n % 20}", f"Question {n}").result(timeout=5)
+        # A throwaway admin session registers the admin and warms Streamlit up, so neither mode pays for it
+        load_test.login_and_join(load_test.ADMIN_NAME, load_test.ADMIN_MOBILE, [], load_test.new_stats())
+
+        for mode, make_pool in (("per_call_connections", per_call_pool), ("pooled", pooled)):
+            pools = {read_only: make_pool(StrMChannel)(StrMChannel.DB_PATH, read_only) for read_only in (False, True)}
+            StrMChannel.get_pool = lambda db_path, read_only=False: pools[read_only]
+            StrMChannel.get_catalog_cache().invalidate()
+            StrMChannel.get_user_cache().clear()
+            try:
+                # The admin's reruns: sidebar counts, the reply queue and the chat window. Login and
+                # join run with cold caches; the steady reruns mostly hit them.
+                login = load_test.new_stats()
+                before = sum(pool.opened for pool in pools.values())
+                at = load_test.login_and_join(load_test.ADMIN_NAME, load_test.ADMIN_MOBILE, list(pools.values()), login)
+                login_opened = sum(pool.opened for pool in pools.values()) - before
+                stats = load_test.new_stats()
+                opened = []
+                for _ in range(args.reruns):
+                    before = sum(pool.opened for pool in pools.values())
+                    load_test.timed_run(at, list(pools.values()), stats)
+                    opened.append(sum(pool.opened for pool in pools.values()) - before)
+                # One uncached helper call, where connection setup is the difference
+                call_ms = median_ms(
+                    lambda: [StrMChannel.get_user_by_mobile(load_test.ADMIN_MOBILE) for _ in range(HELPER_CALLS)],
+                    args.repeats,
+                ) / HELPER_CALLS
+            finally:
+                StrMChannel.get_pool = get_pool
+                for pool in pools.values():
+                    pool.close()
+            latencies = [x * 1000 for x in stats["latencies"]]
+            results.append({
+                "mode": mode,
+                "login_reruns": len(login["latencies"]),
+                "login_connections_opened_per_rerun": round(login_opened / len(login["latencies"]), 2),
+                "login_db_statements_per_rerun": round(statistics.mean(login["statements"]), 2),
+                "login_rerun_latency_ms_mean": round(statistics.mean(login["latencies"]) * 1000, 2),
+                "reruns": len(latencies),
+                "connections_opened_per_rerun": round(statistics.mean(opened), 2),
+                "db_statements_per_rerun": round(statistics.mean(stats["statements"]), 2),
+                "rerun_latency_ms": {
+                    "p50": round(load_test.percentile(latencies, 50), 2),
+                    "p95": round(load_test.percentile(latencies, 95), 2),
+                },
+                "helper_call_ms": round(call_ms, 4),
+                "errors": sum(run[key] for run in (login, stats) for key in ("errors", "locked", "error_messages")),
+            })
+    return {"benchmark": "pool", "courses": POOL_COURSES, "messages": POOL_MESSAGES, "results": results}
+
+def bench_courses(args) -> dict:
+    import StrMChannel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        StrMChannel.DB_PATH = os.path.join(tmp, "courses.db")
+        StrMChannel.init_db()
+        storage = StrMChannel.get_storage()
+        rng = random.Random(7)
+        start = time.perf_counter()
+        users = args.interests // INTERESTS_PER_USER
+        with StrMChannel.db() as conn:
+            conn.executemany("INSERT INTO courses (title) VALUES (?)", [(f"Course {n:04d}",) for n in range(args.courses)])
+            conn.executemany(
+                "INSERT INTO users (name, mobile) VALUES (?, ?)", [(f"User {n}", f"8{n:09d}") for n in range(users)]
+            )
+            course_ids = [row[0] for row in conn.execute("SELECT id FROM courses")]
+            user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+            # Through the counter triggers, as the app's own inserts go
+            conn.executemany(
+                "INSERT INTO user_course_interests (user_id, course_id) VALUES (?, ?)",
+                (
+                    (user_id, course_id)
+                    for user_id in user_ids
+                    for course_id in rng.sample(course_ids, min(INTERESTS_PER_USER, len(course_ids)))
+                ),
+            )
+        load_seconds = time.perf_counter() - start
+
+        def count_query(conn: sqlite3.Connection, course_id: int) -> int:
+            return conn.execute("SELECT COUNT(*) FROM user_course_interests WHERE course_id=?", (course_id,)).fetchone()[0]
+
+        def n_plus_one_per_call():
+            # The old admin sidebar: a connection for the course list, then one per course
+            conn = sqlite3.connect(StrMChannel.DB_PATH)
+            courses = conn.execute("SELECT id, title FROM courses ORDER BY title ASC").fetchall()
+            conn.close()
+            counts = []
+            for course_id, title in courses:
+                conn = sqlite3.connect(StrMChannel.DB_PATH)
+                counts.append((course_id, title, count_query(conn, course_id)))
+                conn.close()
+            return counts
+
+        def n_plus_one_pooled():
+            courses = storage.get_courses()
+            counts = []
+            for course_id, title in courses:
+                with StrMChannel.db() as conn:
+                    counts.append((course_id, title, count_query(conn, course_id)))
+            return counts
+
+        def group_by():
+            with StrMChannel.db() as conn:
+                return conn.execute(
+                    """
+                    SELECT c.id, c.title, COUNT(i.id) FROM courses c
+                    LEFT JOIN user_course_interests i ON i.course_id = c.id
+                    GROUP BY c.id ORDER BY c.title ASC
+                    """
+                ).fetchall()
+
+        variants = {
+            "n_plus_one_per_call_connections": (n_plus_one_per_call, args.courses + 1),
+            "n_plus_one_pooled": (n_plus_one_pooled, args.courses + 1),
+            "group_by": (group_by, 1),
+            "interest_count_column": (storage.get_courses_with_interest_counts, 1),
+            # What the sidebar calls: the counter query behind the shared catalog cache
+            "catalog_cache_hit": (StrMChannel.get_courses_with_interest_counts, 0),
+        }
+        expected = sorted(storage.get_courses_with_interest_counts())
+        results = []
+        for name, (run, queries) in variants.items():
+            assert sorted(run()) == expected, f"{name} disagrees with the counters"
+            results.append({"variant": name, "queries": queries, "ms": median_ms(run, args.repeats)})
+    return {
+        "benchmark": "courses",
+        "courses": args.courses,
+        "interests": len(user_ids) * min(INTERESTS_PER_USER, len(course_ids)),
+        "load_seconds": round(load_seconds, 1),
+        "results": results,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the channel's hot paths; prints a JSON report")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--repeats", type=int, default=REPEATS, help="Timed runs per measurement; the median is reported")
+    common.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("render", parents=[common], help="Time render_chat_page and measure its HTML at several chat sizes")
+    p.add_argument("--sizes", type=int, nargs="+", default=RENDER_SIZES, help="Message counts to render")
+    p.set_defaults(func=bench_render)
+
+    p = sub.add_parser("search", parents=[common], help="Compare FTS5 search with a LIKE scan over synthetic messages")
+    p.add_argument("--messages", type=int, default=SEARCH_MESSAGES, help="Synthetic messages to load")
+    p.add_argument("--limit", type=int, default=20, help="Results per query, as one page of the search box")
+    p.set_defaults(func=bench_search)
+
+    p = sub.add_parser("pool", parents=[common], help="Connections opened and latency per admin rerun, with and without pooling")
+    p.add_argument("--reruns", type=int, default=POOL_RERUNS, help="Steady-state reruns timed per mode")
+    p.set_defaults(func=bench_pool)
+
+    p = sub.add_parser("courses", parents=[common], help="Course interest counts: N+1 COUNTs against one query")
+    p.add_argument("--courses", type=int, default=COURSES, help="Courses to create")
+    p.add_argument("--interests", type=int, default=INTERESTS, help="Interests to create, ten per user")
+    p.set_defaults(func=bench_courses)
+
+    args = parser.parse_args(argv)
+    quiet_bare_mode_warnings()
+    # Slow-query warnings are expected while timing the LIKE scans
+    logging.getLogger("motivation_channel").setLevel(logging.ERROR)
+    report = args.func(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
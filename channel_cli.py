@@ -0,0 +1,257 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from streamlit.logger import set_log_level
+
+import StrMChannel as channel
+
+IMPORT_CHUNK_SIZE = 5000
+
+def cmd_check_counts(args) -> int:
+    mismatches = channel.check_counters()
+    for table, row_id, stored, actual in mismatches:
+        print(f"{table} id={row_id}: stored={stored} actual={actual}")
+    if mismatches:
+        print(f"{len(mismatches)} counter(s) out of sync. Run 'rebuild-counts' to repair.")
+        return 1
+    print("All counters are consistent.")
+    return 0
+
+def cmd_rebuild_counts(args) -> int:
+    channel.rebuild_counters()
+    print("Counters rebuilt.")
+    return 0
+
+def read_records(path: str):
+    # Yields (line number, record dict) from a CSV file with a header row or from JSON lines
+    if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson", ".json"):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, exc
+                    continue
+                yield line_no, record if isinstance(record, dict) else ValueError("expected a JSON object")
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+def import_file(path: str, validate, insert, label: str) -> int:
+    chunk = []
+    total = inserted = rejected = 0
+    for line_no, record in read_records(path):
+        total += 1
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(str(record))
+            chunk.append(validate(record))
+        except ValueError as exc:
+            rejected += 1
+            print(f"{path}:{line_no}: {exc}", file=sys.stderr)
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            inserted += insert(chunk)
+            chunk = []
+    if chunk:
+        inserted += insert(chunk)
+    skipped = total - rejected - inserted
+    print(f"{label}: {inserted} imported, {skipped} skipped, {rejected} rejected")
+    return 1 if rejected else 0
+
+def field(record: dict, name: str) -> str:
+    return str(record.get(name) or "").strip()
+
+def validate_user(record: dict):
+    name, mobile = field(record, "name"), field(record, "mobile")
+    if not name:
+        raise ValueError("name cannot be empty")
+    if not channel.is_valid_mobile(mobile):
+        raise ValueError(f"invalid mobile number {mobile!r}")
+    return name, mobile
+
+def validate_course(record: dict):
+    title = field(record, "title")
+    if not title:
+        raise ValueError("title cannot be empty")
+    return (title,)
+
+def validate_interest(record: dict):
+    mobile, title = field(record, "mobile"), field(record, "course")
+    if not channel.is_valid_mobile(mobile):
+        raise ValueError(f"invalid mobile number {mobile!r}")
+    if not title:
+        raise ValueError("course cannot be empty")
+    return mobile, title
+
+def cmd_import_users(args) -> int:
+    return import_file(args.file, validate_user, channel.bulk_add_users, "users")
+
+def cmd_import_courses(args) -> int:
+    return import_file(args.file, validate_course, channel.bulk_add_courses, "courses")
+
+def cmd_import_interests(args) -> int:
+    # Skipped rows are duplicates or reference a user/course that does not exist
+    return import_file(args.file, validate_interest, channel.bulk_add_interests, "interests")
+
+def cmd_export_transcript(args) -> int:
+    event_id = channel.get_event_id_by_name(args.event)
+    if event_id is None:
+        print(f"Event {args.event!r} not found.", file=sys.stderr)
+        return 1
+    columns = ("id", "username", "message", "reply", "reply_by", "timestamp")
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "jsonl":
+            for row in channel.iter_event_messages(event_id):
+                out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+        else:
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            writer.writerows(channel.iter_event_messages(event_id))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+def cmd_export_roster(args) -> int:
+    course_id = next((cid for cid, title in channel.get_all_courses() if title == args.course), None)
+    if course_id is None:
+        print(f"Course {args.course!r} not found.", file=sys.stderr)
+        return 1
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(("name", "mobile", "interested_at"))
+        writer.writerows(channel.iter_interest_roster(course_id))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+def cmd_archive(args) -> int:
+    archived = channel.archive_closed_events(args.older_than_days)
+    for name, count in archived:
+        print(f"Archived {count} message(s) from '{name}'")
+    if archived and not args.no_vacuum:
+        channel.reclaim_space()
+    print(f"{len(archived)} event(s) archived to {channel.archive_path()}")
+    return 0
+
+def cmd_backup(args) -> int:
+    try:
+        result = channel.backup_database(args.dir, args.retention)
+    except (ValueError, FileExistsError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"Backup written to {result['path']} ({result['bytes']} bytes, sha256 {result['sha256']})")
+    print(
+        f"{result['steps']} step(s), {result['restarts']} restart(s), copying {result['copy_ms']} ms "
+        f"(longest step {result['max_step_ms']} ms), {result['seconds']} s total"
+    )
+    print(
+        f"This process's writers: {result['writer_commits']} commit(s) during the backup, "
+        f"mean {result['writer_commit_ms_mean']} ms, max {result['writer_commit_ms_max']} ms, "
+        f"{result['writer_retries']} busy retries"
+    )
+    return 0
+
+def cmd_verify_backup(args) -> int:
+    ok, reason = channel.verify_backup(args.path)
+    print(f"{args.path}: {reason}")
+    return 0 if ok else 1
+
+def cmd_restore(args) -> int:
+    try:
+        channel.restore_backup(args.path)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"Restored {channel.DB_PATH} from {args.path}. Restart running app processes to clear their caches.")
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Motivation Channel maintenance commands")
+    parser.add_argument("--db", default=channel.DB_PATH, help="Path to the SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("check-counts", help="Compare denormalized counters with the source tables")
+    subparsers.add_parser("rebuild-counts", help="Recompute interest and participant counters")
+
+    import_users = subparsers.add_parser("import-users", help="Bulk import users (name, mobile) from CSV or JSONL")
+    import_users.add_argument("file")
+    import_courses = subparsers.add_parser("import-courses", help="Bulk import courses (title) from CSV or JSONL")
+    import_courses.add_argument("file")
+    import_interests = subparsers.add_parser(
+        "import-interests", help="Bulk import interests (mobile, course title) from CSV or JSONL"
+    )
+    import_interests.add_argument("file")
+
+    export = subparsers.add_parser("export-transcript", help="Stream an event's messages as CSV or JSONL")
+    export.add_argument("event", help="Event name")
+    export.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export.add_argument("--output", help="Write to this file instead of stdout")
+
+    roster = subparsers.add_parser("export-roster", help="Stream a course's interested users as CSV")
+    roster.add_argument("course", help="Course title")
+    roster.add_argument("--output", help="Write to this file instead of stdout")
+
+    archive = subparsers.add_parser("archive", help="Move messages of long-closed events into the archive file")
+    archive.add_argument(
+        "--older-than-days", type=float, default=channel.ARCHIVE_AFTER_DAYS, help="Minimum days since the event closed"
+    )
+    archive.add_argument("--no-vacuum", action="store_true", help="Skip reclaiming free pages afterwards")
+
+    backup = subparsers.add_parser("backup", help="Take an online snapshot of the database")
+    backup.add_argument("--dir", help="Snapshot directory (defaults to <db>_backups)")
+    backup.add_argument(
+        "--retention", type=int, default=channel.BACKUP_RETENTION, help="Number of snapshots to keep"
+    )
+    verify = subparsers.add_parser("verify-backup", help="Check a snapshot's sha256 and integrity")
+    verify.add_argument("path")
+    restore = subparsers.add_parser("restore", help="Replace the database with a verified snapshot")
+    restore.add_argument("path")
+
+    args = parser.parse_args(argv)
+    # Streamlit warns about missing runtime context when its caches are used from a plain script
+    set_log_level("error")
+    channel.DB_PATH = args.db
+    # The maintenance commands read and write the SQLite file directly, so any other backend's data
+    # would be out of their reach
+    storage = channel.get_storage()
+    if not isinstance(storage, channel.SQLiteStorage):
+        print(
+            f"The {channel.STORAGE_BACKEND!r} backend is not supported by these commands; "
+            "set MOTIVATION_CHANNEL_BACKEND=sqlite or sharded.",
+            file=sys.stderr,
+        )
+        return 2
+    try:
+        storage.init()
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    commands = {
+        "check-counts": cmd_check_counts,
+        "rebuild-counts": cmd_rebuild_counts,
+        "import-users": cmd_import_users,
+        "import-courses": cmd_import_courses,
+        "import-interests": cmd_import_interests,
+        "export-transcript": cmd_export_transcript,
+        "export-roster": cmd_export_roster,
+        "archive": cmd_archive,
+        "backup": cmd_backup,
+        "verify-backup": cmd_verify_backup,
+        "restore": cmd_restore,
+    }
+    return commands[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
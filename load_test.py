@@ -0,0 +1,229 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+# Run the app through an import so the harness shares the app's cached connection pools
+APP_SCRIPT = "import StrMChannel\nStrMChannel.main()"
+EVENT_NAME = "Load Test Event"
+ADMIN_NAME = "Vikrant Jadhav (Admin)"
+ADMIN_MOBILE = "9000000000"
+RUN_TIMEOUT = 60
+USER_RECORD_QUERIES = 2
+STEADY_RERUNS = 20
+
+def quiet_bare_mode_warnings():
+    # The harness touches the app's cached resources outside a script run; AppTest also
+    # reloads Streamlit's log level on every run, so disable the logger instead
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def new_stats() -> dict:
+    return {"latencies": [], "statements": [], "locked": 0, "errors": 0, "error_messages": 0}
+
+def timed_run(at: AppTest, pools, stats: dict):
+    before = sum(pool.statements for pool in pools)
+    start = time.perf_counter()
+    at.run(timeout=RUN_TIMEOUT)
+    stats["latencies"].append(time.perf_counter() - start)
+    stats["statements"].append(sum(pool.statements for pool in pools) - before)
+    for exc in at.exception:
+        if "database is locked" in exc.message:
+            stats["locked"] += 1
+        else:
+            stats["errors"] += 1
+    # Writes resolve through futures, so a locked, failed or timed-out write surfaces as st.error
+    stats["error_messages"] += len(at.error)
+
+def click(at: AppTest, label: str):
+    next(b for b in at.button if b.label == label).click()
+
+def login_and_join(name: str, mobile: str, pools, stats: dict) -> AppTest:
+    at = AppTest.from_string(APP_SCRIPT, default_timeout=RUN_TIMEOUT)
+    timed_run(at, pools, stats)
+    at.text_input[0].input(name)
+    at.text_input[1].input(mobile)
+    click(at, "🔑 Register / Login")
+    timed_run(at, pools, stats)
+    next(s for s in at.selectbox if s.label == "Select Event").select(EVENT_NAME)
+    click(at, "👉 Join Event")
+    timed_run(at, pools, stats)
+    return at
+
+def ask_question(at: AppTest, text: str, pools, stats: dict):
+    next(t for t in at.text_area if t.label == "Your question or request:").input(text)
+    click(at, "Send Question")
+    timed_run(at, pools, stats)
+
+def answer_first_question(at: AppTest, pools, stats: dict):
+    timed_run(at, pools, stats)
+    reply_areas = [t for t in at.text_area if t.key == "reply_text"]
+    if reply_areas:
+        reply_areas[0].input("Keep going, you are doing great!")
+        click(at, "Send Reply")
+        timed_run(at, pools, stats)
+
+def run_worker(worker_id: int, sessions: int, rounds: int, db_path: str, with_admin: bool) -> dict:
+    os.environ["MOTIVATION_CHANNEL_DB"] = db_path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    quiet_bare_mode_warnings()
+    import StrMChannel
+
+    # Already there for a shared database; in-process backends need their own copy per worker
+    StrMChannel.create_event(EVENT_NAME)
+
+    # Warm up Streamlit's first-run setup and the schema bootstrap so they are not counted as
+    # rerun latency; the warm-up itself is the process's cold start
+    start = time.perf_counter()
+    AppTest.from_string(APP_SCRIPT, default_timeout=RUN_TIMEOUT).run()
+    cold_start = time.perf_counter() - start
+    pools = [StrMChannel.get_pool(StrMChannel.DB_PATH), StrMChannel.get_pool(StrMChannel.DB_PATH, True)]
+    stats = new_stats()
+    stats["cold_start"] = cold_start
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    apps = [
+        login_and_join(f"Attendee {worker_id}-{i}", f"7{worker_id:04d}{i:05d}", pools, stats)
+        for i in range(sessions)
+    ]
+    admin = login_and_join(ADMIN_NAME, ADMIN_MOBILE, pools, stats) if with_admin else None
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    for round_no in range(rounds):
+        for i, at in enumerate(apps):
+            ask_question(at, f"Question {round_no} from attendee {worker_id}-{i}", pools, stats)
+        if admin:
+            answer_first_question(admin, pools, stats)
+
+    # Steady state: an idle attendee's reruns once everything is cached and bootstrapped
+    steady = new_stats()
+    for _ in range(STEADY_RERUNS if apps else 0):
+        timed_run(apps[0], pools, steady)
+    stats["steady_latencies"] = steady["latencies"]
+    stats["steady_statements"] = steady["statements"]
+
+    stats["memory_per_session"] = memory / max(1, len(apps) + bool(admin))
+    stats["connections_opened"] = sum(pool.opened for pool in pools)
+    stats["submissions"] = StrMChannel.get_submission_guard().stats()
+    stats["error_messages"] += steady["error_messages"]
+    stats["write_queue"] = StrMChannel.get_write_queue(StrMChannel.DB_PATH).stats()
+    users = StrMChannel.get_user_cache().stats()
+    stats["user_cache_hits"] = users["hits"]
+    stats["user_cache_misses"] = users["misses"]
+    return stats
+
+def build_report(args, results, wall_seconds: float) -> dict:
+    latencies = [x * 1000 for r in results for x in r["latencies"]]
+    statements = [x for r in results for x in r["statements"]]
+    hits = sum(r["user_cache_hits"] for r in results)
+    steady = [x * 1000 for r in results for x in r["steady_latencies"]]
+    steady_statements = [x for r in results for x in r["steady_statements"]]
+    return {
+        "backend": args.backend,
+        "sessions": args.sessions,
+        "processes": args.processes,
+        "rounds": args.rounds,
+        "reruns": len(latencies),
+        "wall_seconds": round(wall_seconds, 3),
+        "rerun_latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies, default=0), 2),
+        },
+        "cold_start_ms": round(statistics.mean(r["cold_start"] for r in results) * 1000, 2),
+        "steady_rerun_ms": {
+            "p50": round(percentile(steady, 50), 2),
+            "p95": round(percentile(steady, 95), 2),
+            "db_statements_mean": round(statistics.mean(steady_statements), 2) if steady_statements else 0,
+        },
+        "db_statements_per_rerun": {
+            "mean": round(statistics.mean(statements), 2) if statements else 0,
+            "p95": percentile(statements, 95),
+        },
+        "connections_opened": sum(r["connections_opened"] for r in results),
+        "database_locked_errors": sum(r["locked"] for r in results),
+        "other_errors": sum(r["errors"] for r in results),
+        "error_messages": sum(r["error_messages"] for r in results),
+        # The main database's writer in each worker; the sharded backend writes messages through per-event writers
+        "write_queue": {
+            "batches": sum(r["write_queue"]["batches"] for r in results),
+            "writes": sum(r["write_queue"]["writes"] for r in results),
+            "max_batch": max(r["write_queue"]["max_batch"] for r in results),
+            "retries": sum(r["write_queue"]["retries"] for r in results),
+            "failed_batches": sum(r["write_queue"]["failed_batches"] for r in results),
+        },
+        "memory_per_session_kb": round(statistics.mean(r["memory_per_session"] for r in results) / 1024, 1),
+        "question_submissions": {
+            name: sum(r["submissions"][name] for r in results) for name in results[0]["submissions"]
+        },
+        "user_cache": {
+            "hits": hits,
+            "misses": sum(r["user_cache_misses"] for r in results),
+            # Each hit replaces the user row and interest set queries
+            "saved_queries_per_session_minute": round(
+                USER_RECORD_QUERIES * hits / max(1, args.sessions) / (wall_seconds / 60), 1
+            ),
+        },
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent attendees of one live event against a temporary database"
+    )
+    parser.add_argument("--sessions", type=int, default=300, help="Total attendee sessions")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes driving the sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="Questions asked by every attendee")
+    parser.add_argument(
+        "--backend",
+        default=os.environ.get("MOTIVATION_CHANNEL_BACKEND", "sqlite"),
+        help="Storage backend to drive (sqlite or memory; memory keeps a separate store per worker process)",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    quiet_bare_mode_warnings()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load_test.db")
+        os.environ["MOTIVATION_CHANNEL_DB"] = db_path
+        os.environ["MOTIVATION_CHANNEL_BACKEND"] = args.backend
+        import StrMChannel
+
+        StrMChannel.bootstrap_storage(StrMChannel.STORAGE_BACKEND, StrMChannel.DB_PATH)
+        StrMChannel.create_event(EVENT_NAME)
+
+        processes = max(1, min(args.processes, args.sessions))
+        jobs = [
+            (worker_id, args.sessions // processes + (worker_id < args.sessions % processes), args.rounds, db_path, worker_id == 0)
+            for worker_id in range(processes)
+        ]
+        start = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(processes) as workers:
+            results = workers.starmap(run_worker, jobs)
+        report = build_report(args, results, time.perf_counter() - start)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    failed = report["other_errors"] + report["error_messages"] + report["write_queue"]["failed_batches"]
+    return 0 if failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
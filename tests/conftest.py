@@ -0,0 +1,23 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import StrMChannel as channel  # noqa: E402
+
+logging.getLogger("motivation_channel").setLevel(logging.ERROR)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Every test gets its own database file. Pools, writers and shard maps are cached per path, so a
+    # fresh path means fresh ones; the path-independent caches are shared by the process and cleared.
+    path = str(tmp_path / "channel.db")
+    monkeypatch.setattr(channel, "DB_PATH", path)
+    channel.get_catalog_cache().invalidate()
+    channel.get_user_cache().clear()
+    channel.get_archive_cache().clear()
+    return path
@@ -0,0 +1,32 @@
+import StrMChannel as channel
+
+
+def archived_event(messages: int) -> int:
+    channel.init_db()
+    channel.create_event("Morning")
+    event_id = channel.get_event_id_by_name("Morning")
+    for i in range(messages):
+        channel.add_message(event_id, f"user{i % 2}", f"question {i}").result(timeout=5)
+    channel.close_event(event_id)
+    assert channel.archive_event(event_id, "Morning") == messages
+    return event_id
+
+
+def test_chat_reads_of_an_archived_event(db_path):
+    event_id = archived_event(5)
+    rows = channel.get_messages(event_id)
+    ids = [row[0] for row in rows]
+    assert [row[2] for row in rows] == [f"question {i}" for i in range(5)]
+
+    assert channel.get_recent_messages(event_id, 2) == rows[3:]
+    assert channel.get_messages_before(event_id, ids[3], 2) == rows[1:3]
+    assert channel.get_messages_after(event_id, ids[2]) == rows[3:]
+    assert channel.get_unique_user_count(event_id) == 2
+    assert [row[:5] for row in channel.iter_event_messages(event_id)] == rows
+
+
+def test_archiving_leaves_no_rows_behind(db_path):
+    event_id = archived_event(3)
+    with channel.db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages WHERE event_id=?", (event_id,)).fetchone()[0] == 0
+    assert channel.is_event_archived(event_id)
@@ -0,0 +1,53 @@
+import os
+import threading
+
+import StrMChannel as channel
+
+
+def test_backups_in_the_same_second_get_distinct_names(db_path, tmp_path):
+    channel.init_db()
+    directory = str(tmp_path / "backups")
+    first = channel.backup_database(directory)
+    second = channel.backup_database(directory)
+
+    assert first["path"] != second["path"]
+    assert channel.list_backups(directory) == [second["path"], first["path"]]
+    assert all(channel.verify_backup(path)[0] for path in (first["path"], second["path"]))
+
+
+def test_older_snapshot_names_are_still_listed(db_path, tmp_path):
+    directory = tmp_path / "backups"
+    directory.mkdir()
+    (directory / "channel-20250101-120000.db").write_bytes(b"")
+    assert channel.list_backups(str(directory)) == [str(directory / "channel-20250101-120000.db")]
+
+
+def test_reports_writer_commits_during_the_copy(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(channel, "BACKUP_PAGES_PER_STEP", 1)
+    monkeypatch.setattr(channel, "BACKUP_STEP_SLEEP_SECONDS", 0.02)
+    channel.init_db()
+    for i in range(50):
+        channel.add_user("x" * 200 + str(i), f"90000{i:05d}")
+    channel.create_event("Morning")
+    event_id = channel.get_event_id_by_name("Morning")
+
+    done = threading.Event()
+
+    def write_until_done():
+        i = 0
+        while not done.is_set():
+            channel.add_message(event_id, "asha", f"question {i}").result(timeout=5)
+            i += 1
+
+    writer = threading.Thread(target=write_until_done)
+    writer.start()
+    try:
+        result = channel.backup_database(str(tmp_path / "backups"))
+    finally:
+        done.set()
+        writer.join()
+
+    assert result["writer_commits"] > 0
+    assert result["writer_commit_ms_max"] >= result["writer_commit_ms_mean"] > 0
+    assert "lock_held_ms" not in result
+    assert os.path.exists(result["path"] + ".sha256")
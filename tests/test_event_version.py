@@ -0,0 +1,42 @@
+import threading
+
+import StrMChannel as channel
+
+
+def test_writes_from_other_processes_bump_the_version(db_path, monkeypatch):
+    monkeypatch.setattr(channel, "get_event_bus", lambda bus=channel.EventBus(): bus)
+    monkeypatch.setattr(channel, "CHAT_DB_CHECK_SECONDS", 0)
+    channel.init_db()
+    channel.create_event("Morning")
+    event_id = channel.get_event_id_by_name("Morning")
+    # Writing through the storage backend skips this process's bus, like a write from another replica
+    storage = channel.get_storage()
+
+    version = channel.event_version(event_id)
+    assert channel.event_version(event_id) == version
+
+    storage.add_message(event_id, "asha", "hello").result(timeout=5)
+    assert channel.event_version(event_id) > version
+    version = channel.event_version(event_id)
+
+    message_id = storage.get_messages(event_id)[0][0]
+    storage.add_reply(message_id, "welcome", "admin").result(timeout=5)
+    assert channel.event_version(event_id) > version
+
+
+def test_db_checks_are_throttled(db_path, monkeypatch):
+    monkeypatch.setattr(channel, "get_event_bus", lambda bus=channel.EventBus(): bus)
+    monkeypatch.setattr(channel, "CHAT_DB_CHECK_SECONDS", 60)
+    channel.init_db()
+    channel.create_event("Morning")
+    event_id = channel.get_event_id_by_name("Morning")
+
+    version = channel.event_version(event_id)
+    channel.get_storage().add_message(event_id, "asha", "hello").result(timeout=5)
+    assert channel.event_version(event_id) == version
+    # Writes made through this process's helpers still publish as soon as they commit
+    published = threading.Event()
+    future = channel.add_message(event_id, "asha", "again")
+    future.add_done_callback(lambda _: published.set())
+    assert published.wait(timeout=5)
+    assert channel.event_version(event_id) > version
@@ -0,0 +1,32 @@
+import threading
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.testing.v1 import AppTest
+
+import StrMChannel as channel
+
+# Holding every task until all of them are running puts one task on each pool thread
+all_threads_busy = threading.Barrier(channel.READ_WORKERS)
+
+
+def current_ctx(_):
+    all_threads_busy.wait(timeout=10)
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def test_pool_threads_drop_the_session_context(db_path):
+    script = f"""
+import streamlit as st
+import StrMChannel
+from test_fetch_many import current_ctx
+
+seen = StrMChannel.fetch_many({{i: (current_ctx, (i,)) for i in range({channel.READ_WORKERS})}})
+st.session_state.attached = all(ctx is not None for ctx in seen.values())
+"""
+    at = AppTest.from_string(script).run()
+    assert not at.exception
+    assert at.session_state.attached
+
+    # Tasks submitted outside any session must not run under the previous session's context
+    seen = channel.fetch_many({i: (current_ctx, (i,)) for i in range(channel.READ_WORKERS)})
+    assert all(ctx is None for ctx in seen.values())
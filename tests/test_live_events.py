@@ -0,0 +1,52 @@
+import random
+import sqlite3
+
+import pytest
+
+import StrMChannel as channel
+
+# The query get_live_events_for_user ran before LiveEventIndex replaced it
+LEGACY_SQL = """
+    SELECT DISTINCT e.id, e.name, e.course_id FROM events e
+    LEFT JOIN user_course_interests i ON e.course_id = i.course_id
+    WHERE e.live=1 AND (i.user_id=? OR e.course_id IS NULL)
+    ORDER BY e.id DESC
+"""
+
+
+def assert_matches_legacy(db_path, user_ids):
+    conn = sqlite3.connect(db_path)
+    try:
+        for user_id in user_ids:
+            expected = conn.execute(LEGACY_SQL, (user_id,)).fetchall()
+            assert channel.get_live_events_for_user(user_id) == expected, user_id
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy_query(db_path, seed):
+    rng = random.Random(seed)
+    channel.init_db()
+    for i in range(20):
+        channel.add_user(f"User {i}", f"9{i:09d}")
+    for i in range(8):
+        channel.add_course(f"Course {i}")
+    user_ids = [channel.get_user_by_mobile(f"9{i:09d}")[0] for i in range(20)]
+    course_ids = [course_id for course_id, _ in channel.get_all_courses()]
+
+    # Each round mutates interests, events and courses, then compares every user through the caches
+    for round_number in range(6):
+        for _ in range(15):
+            channel.add_user_interest(rng.choice(user_ids), rng.choice(course_ids))
+        for i in range(4):
+            course_id = rng.choice(course_ids + [None, None])
+            channel.create_event(f"Event {round_number}.{i}", course_id)
+        live = channel.get_live_events()
+        for event_id, _, _ in rng.sample(live, k=min(2, len(live))):
+            channel.close_event(event_id)
+        if round_number == 3:
+            removed = rng.choice(course_ids)
+            channel.remove_course(removed)
+            course_ids.remove(removed)
+        assert_matches_legacy(db_path, user_ids)
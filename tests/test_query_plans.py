@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+import StrMChannel as channel
+
+# The hot read paths and the index each one has to search, in the shape SQLiteStorage issues them
+PLANS = [
+    (
+        "SELECT id, username, message, reply, reply_by FROM messages WHERE event_id=? ORDER BY id ASC",
+        (1,),
+        "idx_messages_event_id",
+    ),
+    (
+        "SELECT id, username, message, reply, reply_by FROM messages WHERE event_id=? AND id > ? ORDER BY id ASC",
+        (1, 10),
+        "idx_messages_event_id",
+    ),
+    (
+        "SELECT id, username, message, reply, reply_by FROM messages WHERE event_id=? ORDER BY id DESC LIMIT ?",
+        (1, 50),
+        "idx_messages_event_id",
+    ),
+    (
+        "SELECT id, reply, reply_by, reply_seq FROM messages WHERE event_id=? AND reply_seq > ? ORDER BY reply_seq ASC",
+        (1, 0),
+        "idx_messages_event_reply_seq",
+    ),
+    (
+        "SELECT COALESCE(MAX(reply_seq), 0) FROM messages WHERE event_id=?",
+        (1,),
+        "idx_messages_event_reply_seq",
+    ),
+    (
+        "SELECT id, username, message FROM messages WHERE event_id=? AND reply IS NULL ORDER BY id ASC LIMIT ? OFFSET ?",
+        (1, 20, 0),
+        "idx_messages_unanswered",
+    ),
+    (
+        "SELECT COUNT(*) FROM messages WHERE event_id=? AND reply IS NULL",
+        (1,),
+        "idx_messages_unanswered",
+    ),
+    (
+        "SELECT id, name, course_id FROM events WHERE live=1 ORDER BY id DESC",
+        (),
+        "idx_events_live",
+    ),
+    (
+        "SELECT i.id FROM user_course_interests i WHERE i.course_id=? AND i.timestamp=? AND i.id<? "
+        "ORDER BY i.timestamp DESC, i.id DESC LIMIT ?",
+        (1, "2026-01-01 00:00:00", 10, 100),
+        "idx_interests_course_timestamp",
+    ),
+    (
+        "SELECT i.id FROM user_course_interests i WHERE i.course_id=? AND i.timestamp<? "
+        "ORDER BY i.timestamp DESC, i.id DESC LIMIT ?",
+        (1, "2026-01-01 00:00:00", 100),
+        "idx_interests_course_timestamp",
+    ),
+]
+
+
+@pytest.fixture
+def conn(db_path):
+    channel.init_db()
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql, params, index", PLANS)
+def test_query_uses_index(conn, sql, params, index):
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    assert any(f"INDEX {index} " in step for step in plan), plan
+    # Every ORDER BY above is served by the index, never by a sort pass
+    assert not any("TEMP B-TREE" in step for step in plan), plan
@@ -0,0 +1,48 @@
+from streamlit.testing.v1 import AppTest
+
+import StrMChannel as channel
+
+
+def test_redact_sql_replaces_every_literal():
+    statement = (
+        "SELECT id FROM users WHERE mobile='9876543210' AND name='O''Neil' AND score > -3.5 "
+        "AND data = X'ab01' AND t <= datetime('now', '-30 days') LIMIT 20 OFFSET 40"
+    )
+    assert channel.redact_sql(statement) == (
+        "SELECT id FROM users WHERE mobile=? AND name=? AND score > ? "
+        "AND data = ? AND t <= datetime(?, ?) LIMIT ? OFFSET ?"
+    )
+    # Digits inside identifiers are not literals
+    assert channel.redact_sql("SELECT idx_1, t2.id FROM t2") == "SELECT idx_1, t2.id FROM t2"
+
+
+def test_slow_log_keeps_no_parameters(db_path, monkeypatch):
+    stats = channel.QueryStats()
+    monkeypatch.setattr(channel, "get_query_stats", lambda: stats)
+    monkeypatch.setattr(channel, "SLOW_QUERY_MS", 0)
+    channel.init_db()
+    channel.add_user("Asha", "9876543210")
+    channel.get_user_by_mobile("9876543210")
+
+    logged = stats.to_json()
+    assert "9876543210" not in logged and "Asha" not in logged
+    slow = [entry for entry in stats.snapshot()[1] if entry["helper"] == "get_user_by_mobile"]
+    assert slow[0]["queries"][0]["sql"] == "SELECT id, name FROM users WHERE mobile=?"
+    assert slow[0]["queries"][0]["plan"]
+
+
+def test_fragment_reruns_account_their_own_queries(db_path):
+    script = f"""
+import StrMChannel
+StrMChannel.DB_PATH = {db_path!r}
+StrMChannel.init_db()
+
+@StrMChannel.fragment_queries
+def pane():
+    StrMChannel.get_live_events()
+
+pane()
+"""
+    at = AppTest.from_string(script).run()
+    assert not at.exception
+    assert at.session_state.last_rerun_queries["pane"]["get_live_events"][0] == 1
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+import StrMChannel as channel
+
+
+def test_refuses_a_database_with_unsharded_messages(db_path):
+    plain = channel.SQLiteStorage()
+    plain.init()
+    plain.create_event("Morning", None)
+    plain.add_message(plain.get_event_id_by_name("Morning"), "asha", "hello").result(timeout=5)
+
+    with pytest.raises(ValueError, match="main table"):
+        channel.ShardedSQLiteStorage().init()
+
+
+def test_accepts_a_database_without_messages(db_path):
+    channel.SQLiteStorage().init()
+    channel.ShardedSQLiteStorage().init()
+
+
+def test_opening_a_shard_does_not_block_other_events(db_path, monkeypatch):
+    storage = channel.ShardedSQLiteStorage()
+    storage.init()
+    storage.create_event("Warm", None)
+    storage.create_event("Cold", None)
+    warm = storage.get_event_id_by_name("Warm")
+    cold = storage.get_event_id_by_name("Cold")
+    storage.add_message(warm, "asha", "first").result(timeout=5)
+
+    init_shard = channel._init_shard
+    opening = threading.Event()
+    release = threading.Event()
+
+    def slow_init_shard(conn, event_id):
+        if event_id == cold:
+            opening.set()
+            release.wait(timeout=10)
+        init_shard(conn, event_id)
+
+    monkeypatch.setattr(channel, "_init_shard", slow_init_shard)
+    cold_write = channel.get_shard_executor().submit(
+        lambda: storage.add_message(cold, "ravi", "hello").result(timeout=15)
+    )
+    assert opening.wait(timeout=5)
+    # The cold shard is stuck opening; the warm one still takes writes and reads
+    started = time.monotonic()
+    assert storage.add_message(warm, "asha", "second").result(timeout=2) == warm
+    assert len(storage.get_messages(warm)) == 2
+    assert time.monotonic() - started < 2
+    release.set()
+    assert cold_write.result(timeout=10) == cold
+    assert len(storage.get_messages(cold)) == 1
+
+
+def test_concurrent_writes_across_evicted_shards(db_path):
+    storage = channel.ShardedSQLiteStorage()
+    storage.init()
+    shards = channel.get_shard_map(db_path)
+    shards.max_open = 2
+    for i in range(6):
+        storage.create_event(f"Event {i}", None)
+    event_ids = [storage.get_event_id_by_name(f"Event {i}") for i in range(6)]
+
+    def post(thread_number: int):
+        return [
+            storage.add_message(event_ids[(thread_number + i) % 6], f"user{thread_number}", f"message {i}")
+            for i in range(30)
+        ]
+
+    threads = [channel.get_shard_executor().submit(post, n) for n in range(8)]
+    for futures in [thread.result(timeout=30) for thread in threads]:
+        for future in futures:
+            future.result(timeout=10)
+    assert sum(len(storage.get_messages(event_id)) for event_id in event_ids) == 8 * 30
+    assert shards.stats()["open"] <= 2
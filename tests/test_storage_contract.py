@@ -0,0 +1,143 @@
+import os
+
+import pytest
+
+import StrMChannel as channel
+
+
+@pytest.fixture(params=sorted(channel.STORAGE_BACKENDS))
+def storage(request, db_path):
+    backend = channel.STORAGE_BACKENDS[request.param]()
+    backend.init()
+    return backend
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        channel.Storage()
+
+
+def test_users(storage):
+    assert storage.add_user("Asha", "9000000001")
+    assert not storage.add_user("Other", "9000000001")
+    user_id, name = storage.get_user_by_mobile("9000000001")
+    assert name == "Asha"
+    assert storage.get_user_by_mobile("9000000002") is None
+    assert storage.load_user(user_id) == channel.UserRecord(user_id, "Asha", "9000000001", frozenset())
+    assert storage.load_user(user_id + 100) is None
+
+
+def test_courses_and_interests(storage):
+    storage.add_user("Asha", "9000000001")
+    storage.add_user("Ravi", "9000000002")
+    asha = storage.get_user_by_mobile("9000000001")[0]
+    ravi = storage.get_user_by_mobile("9000000002")[0]
+    assert storage.add_course("Zen")
+    assert storage.add_course("Mind")
+    assert not storage.add_course("Zen")
+    courses = storage.get_courses()
+    assert [title for _, title in courses] == ["Mind", "Zen"]
+    zen = courses[1][0]
+
+    assert storage.add_user_interest(asha, zen)
+    assert storage.add_user_interest(ravi, zen)
+    assert not storage.add_user_interest(asha, zen)
+    assert storage.load_user(asha).interests == {zen}
+    assert storage.count_interest_for_course(zen) == 2
+    assert storage.get_courses_with_interest_counts() == [(courses[0][0], "Mind", 0), (zen, "Zen", 2)]
+
+    first = storage.get_interest_roster(zen, 1)
+    assert len(first) == 1
+    rest = storage.get_interest_roster(zen, 10, first[0][2:])
+    assert sorted(row[:2] for row in first + rest) == [("Asha", "9000000001"), ("Ravi", "9000000002")]
+    assert storage.get_interest_roster(zen, 10, rest[-1][2:]) == []
+
+
+def test_events(storage):
+    storage.add_course("Zen")
+    course_id = storage.get_courses()[0][0]
+    assert storage.create_event("Morning", None)
+    assert not storage.create_event("Morning", None)
+    assert storage.create_event("Evening", course_id)
+    morning = storage.get_event_id_by_name("Morning")
+    evening = storage.get_event_id_by_name("Evening")
+    assert storage.get_event_id_by_name("Night") is None
+    assert storage.get_live_events() == [(evening, "Evening", course_id), (morning, "Morning", None)]
+
+    storage.close_event(morning)
+    assert storage.get_live_events() == [(evening, "Evening", course_id)]
+    storage.remove_course(course_id)
+    assert storage.get_live_events() == []
+
+
+def test_messages_and_replies(storage):
+    storage.create_event("Morning", None)
+    event_id = storage.get_event_id_by_name("Morning")
+    for i in range(5):
+        assert storage.add_message(event_id, f"user{i % 2}", f"hello world {i}").result(timeout=5) == event_id
+    assert storage.get_unique_user_count(event_id) == 2
+
+    messages = storage.get_messages(event_id)
+    ids = [row[0] for row in messages]
+    assert [row[2] for row in messages] == [f"hello world {i}" for i in range(5)]
+    assert ids == sorted(ids)
+    assert [row[0] for row in storage.get_recent_messages(event_id, 2)] == ids[3:]
+    assert [row[0] for row in storage.get_messages_before(event_id, ids[3], 2)] == ids[1:3]
+    assert [row[0] for row in storage.get_messages_after(event_id, ids[2])] == ids[3:]
+
+    assert storage.get_reply_version(event_id) == 0
+    assert storage.add_reply(ids[1], "keep going", "admin").result(timeout=5) == event_id
+    assert storage.add_reply(ids[-1] + 1000, "lost", "admin").result(timeout=5) is None
+    assert storage.get_reply_version(event_id) == 1
+    assert storage.get_replies_after(event_id, 0) == [(ids[1], "keep going", "admin", 1)]
+    assert storage.get_replies_after(event_id, 1) == []
+    assert storage.count_unanswered(event_id) == 4
+    assert [row[0] for row in storage.get_unanswered_messages(event_id, 2, 1)] == [ids[2], ids[3]]
+
+
+def test_iter_messages(storage):
+    storage.create_event("Morning", None)
+    event_id = storage.get_event_id_by_name("Morning")
+    for i in range(5):
+        storage.add_message(event_id, "asha", f"question {i}").result(timeout=5)
+    storage.add_reply(storage.get_messages(event_id)[0][0], "answer", "admin").result(timeout=5)
+
+    rows = list(storage.iter_messages(event_id, 2))
+    assert [row[:5] for row in rows] == storage.get_messages(event_id)
+    assert all(row[5] for row in rows)
+
+
+def test_idempotency_key(storage):
+    storage.create_event("Morning", None)
+    event_id = storage.get_event_id_by_name("Morning")
+    assert storage.add_message(event_id, "asha", "why?", "key-1").result(timeout=5) == event_id
+    assert storage.add_message(event_id, "asha", "why?", "key-1").result(timeout=5) == event_id
+    assert storage.add_message(event_id, "asha", "why?", "key-2").result(timeout=5) == event_id
+    assert len(storage.get_messages(event_id)) == 2
+
+
+def test_search(storage):
+    storage.create_event("Morning", None)
+    storage.create_event("Evening", None)
+    morning = storage.get_event_id_by_name("Morning")
+    evening = storage.get_event_id_by_name("Evening")
+    storage.add_message(morning, "asha", "how to stay motivated").result(timeout=5)
+    storage.add_message(evening, "ravi", "motivation after failure").result(timeout=5)
+    replied = storage.get_messages(evening)[0][0]
+    storage.add_reply(replied, "rest, then restart", "admin").result(timeout=5)
+
+    assert {row[2] for row in storage.search_messages("motiv", None, 10, 0)} == {"Morning", "Evening"}
+    assert [row[2] for row in storage.search_messages("motiv", evening, 10, 0)] == ["Evening"]
+    assert [row[0] for row in storage.search_messages("restart", None, 10, 0)] == [replied]
+    assert len(storage.search_messages("motiv", None, 1, 1)) == 1
+    assert storage.search_messages("!!", None, 10, 0) == []
+
+
+def test_reading_an_empty_event_creates_nothing(storage, db_path):
+    storage.create_event("Morning", None)
+    event_id = storage.get_event_id_by_name("Morning")
+    assert storage.get_messages(event_id) == []
+    assert storage.get_unique_user_count(event_id) == 0
+    assert storage.count_unanswered(event_id) == 0
+    assert storage.search_messages("anything", event_id, 10, 0) == []
+    assert not os.path.exists(channel.get_shard_map(db_path).path(event_id))
@@ -0,0 +1,51 @@
+import threading
+import uuid
+from collections import Counter
+
+import StrMChannel as channel
+
+THREADS = 16
+ATTEMPTS_PER_THREAD = 25
+
+
+def test_concurrent_submissions_are_counted_once(db_path, monkeypatch):
+    guard = channel.SubmissionGuard(per_minute=60, burst=3, dedup_seconds=60)
+    monkeypatch.setattr(channel, "get_submission_guard", lambda: guard)
+    channel.init_db()
+    channel.create_event("Hot")
+    event_id = channel.get_event_id_by_name("Hot")
+
+    outcomes = Counter()
+    futures = []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def hammer(thread_number: int):
+        # Threads share usernames and texts, so the same (user, event) bucket and digest are raced
+        start.wait()
+        for attempt in range(ATTEMPTS_PER_THREAD):
+            username = f"user{thread_number % 4}"
+            message = f"Question {attempt % 6}"
+            rejected, future = channel.submit_question(event_id, username, message, uuid.uuid4().hex)
+            with lock:
+                outcomes[rejected or "accepted"] += 1
+                if future is not None:
+                    futures.append(future)
+
+    threads = [threading.Thread(target=hammer, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for future in futures:
+        future.result(timeout=10)
+
+    stats = guard.stats()
+    assert stats == {
+        "accepted": outcomes["accepted"],
+        "rate_limited": outcomes["rate_limited"],
+        "deduplicated": outcomes["duplicate"],
+    }
+    assert sum(stats.values()) == THREADS * ATTEMPTS_PER_THREAD
+    assert stats["accepted"] > 0 and stats["rate_limited"] > 0 and stats["deduplicated"] > 0
+    assert len(channel.get_messages(event_id)) == stats["accepted"]
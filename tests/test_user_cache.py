@@ -0,0 +1,31 @@
+import StrMChannel as channel
+
+
+def test_records_expire_so_other_processes_writes_show_up(db_path, monkeypatch):
+    channel.init_db()
+    channel.add_user("Asha", "9000000001")
+    channel.add_course("Zen")
+    user_id = channel.get_user_by_mobile("9000000001")[0]
+    course_id = channel.get_all_courses()[0][0]
+    assert channel.get_user_interest_ids(user_id) == frozenset()
+
+    # Written without going through this process's helpers, as the CLI or another replica would
+    channel.get_storage().add_user_interest(user_id, course_id)
+    assert channel.get_user_interest_ids(user_id) == frozenset()
+
+    monkeypatch.setattr(channel, "USER_CACHE_TTL_SECONDS", 0)
+    assert channel.get_user_interest_ids(user_id) == {course_id}
+
+
+def test_helper_writes_refresh_the_record_at_once(db_path):
+    channel.init_db()
+    channel.add_user("Asha", "9000000001")
+    channel.add_course("Zen")
+    user_id = channel.get_user_by_mobile("9000000001")[0]
+    course_id = channel.get_all_courses()[0][0]
+    assert channel.get_user_interest_ids(user_id) == frozenset()
+
+    assert channel.add_user_interest(user_id, course_id)
+    assert channel.get_user_interest_ids(user_id) == {course_id}
+    channel.bulk_add_interests([("9000000001", "Zen")])
+    assert channel.get_user_record(user_id).interests == {course_id}